@@ -19,10 +19,17 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+import aiofiles
 from sqlalchemy import create_engine, text, MetaData, Table, Column, String, Integer, ForeignKey
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,13 +37,76 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Tables whose foreign keys are sampled for orphaned rows; names are
+# interpolated into SQL, so anything outside this set is never scanned.
+ORPHAN_CHECK_TABLES = frozenset({"organization", "subscription", "usagemetric"})
+
+# Static catalog and data queries, built once at import time
+RLS_FLAGS_QUERY = text("""
+    SELECT relname, relrowsecurity FROM pg_class
+    WHERE relnamespace = 'public'::regnamespace
+    AND relkind IN ('r', 'p')
+""")
+
+COLUMNS_QUERY = text("""
+    SELECT table_name, column_name FROM information_schema.columns
+    WHERE table_schema = 'public'
+""")
+
+INDEXES_QUERY = text("""
+    SELECT tablename, indexname FROM pg_indexes
+    WHERE schemaname = 'public'
+""")
+
+POLICIES_QUERY = text("""
+    SELECT policyname FROM pg_policies WHERE schemaname = 'public'
+""")
+
+FOREIGN_KEYS_QUERY = text("""
+    SELECT src.relname, sa.attname, dst.relname, da.attname
+    FROM pg_constraint con
+    JOIN pg_class src ON src.oid = con.conrelid
+    JOIN pg_class dst ON dst.oid = con.confrelid
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey)
+        WITH ORDINALITY AS k(src_attnum, dst_attnum, ord)
+    JOIN pg_attribute sa ON sa.attrelid = con.conrelid AND sa.attnum = k.src_attnum
+    JOIN pg_attribute da ON da.attrelid = con.confrelid AND da.attnum = k.dst_attnum
+    WHERE con.contype = 'f'
+    AND con.connamespace = 'public'::regnamespace
+""")
+
+DEFAULT_DATA_QUERY = text("""
+    SELECT
+        (SELECT COUNT(*) FROM organization WHERE slug = 'default-org') AS default_org_count,
+        (
+            SELECT COALESCE(
+                json_agg(json_build_object('name', name, 'plan_type', plan_type, 'price', price) ORDER BY price),
+                '[]'::json
+            )
+            FROM subscriptionplan
+        ) AS plans
+""")
+
+TABLE_SIZES_QUERY = text("""
+    SELECT
+        relname,
+        pg_size_pretty(pg_total_relation_size(oid)) AS size,
+        reltuples::bigint AS estimated_rows
+    FROM pg_class
+    WHERE relnamespace = 'public'::regnamespace
+    AND relkind IN ('r', 'p')
+    AND relname = ANY(:tables)
+    ORDER BY pg_total_relation_size(oid) DESC
+""")
+
 
 class MigrationValidator:
     """Validates multi-tenant database migration integrity."""
 
-    def __init__(self, db_url: str, comprehensive: bool = False):
+    def __init__(self, db_url: str, comprehensive: bool = False, pool_size: int = 20):
         self.db_url = db_url
         self.comprehensive = comprehensive
+        self.pool_size = pool_size
         self.results = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "database_url": db_url.replace("://", "://***:***@") if "://" in db_url else db_url,
@@ -45,6 +115,9 @@ class MigrationValidator:
             "warnings": [],
             "recommendations": []
         }
+        self._engine: Optional[AsyncEngine] = None
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_lock = asyncio.Lock()
 
     async def validate_all(self) -> Dict[str, Any]:
         """Run all validation checks."""
@@ -67,26 +140,26 @@ class MigrationValidator:
                 ("Data Consistency", self._validate_data_consistency),
             ])
 
-        for check_name, check_func in validation_checks:
-            logger.info(f"📋 Running {check_name} validation...")
-            try:
-                result = await check_func()
-                self.results["validation_results"][check_name] = result
-                if result["status"] == "PASS":
-                    logger.info(f"  ✅ {check_name}: PASSED")
-                elif result["status"] == "WARN":
-                    logger.warning(f"  ⚠️  {check_name}: WARNING - {result.get('message', '')}")
-                    self.results["warnings"].append(f"{check_name}: {result.get('message', '')}")
-                else:
-                    logger.error(f"  ❌ {check_name}: FAILED - {result.get('message', '')}")
-                    self.results["errors"].append(f"{check_name}: {result.get('message', '')}")
-            except Exception as e:
-                logger.error(f"  💥 {check_name}: EXCEPTION - {e}")
-                self.results["validation_results"][check_name] = {
-                    "status": "ERROR",
-                    "message": str(e)
-                }
-                self.results["errors"].append(f"{check_name}: {str(e)}")
+        self._engine = create_async_engine(
+            self.db_url,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=self.pool_size,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_recycle=300,
+        )
+        try:
+            # Schema Structure doubles as a connectivity probe; without
+            # --comprehensive, an ERROR there skips the remaining checks.
+            first_check, remaining_checks = validation_checks[:1], validation_checks[1:]
+            await self._run_checks(first_check)
+            first_name = first_check[0][0]
+            if not self.comprehensive and self.results["validation_results"][first_name]["status"] == "ERROR":
+                logger.error(f"🛑 {first_name} errored; skipping remaining checks")
+            else:
+                await self._run_checks(remaining_checks)
+        finally:
+            await self._engine.dispose()
 
         # Generate recommendations
         self._generate_recommendations()
@@ -104,6 +177,83 @@ class MigrationValidator:
 
         return self.results
 
+    async def _run_checks(self, validation_checks: List[tuple]) -> None:
+        """Run validation checks concurrently against the shared engine and record results."""
+        for check_name, _ in validation_checks:
+            logger.info(f"📋 Running {check_name} validation...")
+
+        results = await asyncio.gather(
+            *(check_func() for _, check_func in validation_checks),
+            return_exceptions=True,
+        )
+
+        for (check_name, _), result in zip(validation_checks, results):
+            if isinstance(result, Exception):
+                logger.error(f"  💥 {check_name}: EXCEPTION - {result}")
+                self.results["validation_results"][check_name] = {
+                    "status": "ERROR",
+                    "message": str(result)
+                }
+                self.results["errors"].append(f"{check_name}: {str(result)}")
+                continue
+
+            self.results["validation_results"][check_name] = result
+            if result["status"] == "PASS":
+                logger.info(f"  ✅ {check_name}: PASSED")
+            elif result["status"] == "WARN":
+                logger.warning(f"  ⚠️  {check_name}: WARNING - {result.get('message', '')}")
+                self.results["warnings"].append(f"{check_name}: {result.get('message', '')}")
+            else:
+                logger.error(f"  ❌ {check_name}: FAILED - {result.get('message', '')}")
+                self.results["errors"].append(f"{check_name}: {result.get('message', '')}")
+
+    async def _schema_snapshot(self) -> Dict[str, Any]:
+        """Return cached public-schema catalog data shared by the structural checks.
+
+        The first caller loads the snapshot; concurrent checks wait on the lock
+        and reuse it.
+        """
+        async with self._snapshot_lock:
+            if self._snapshot is None:
+                async with self._engine.connect() as conn:
+                    result = await conn.execute(RLS_FLAGS_QUERY)
+                    rls = {relname: rls_enabled for relname, rls_enabled in result}
+
+                    result = await conn.execute(COLUMNS_QUERY)
+                    columns: Dict[str, set] = {}
+                    for table_name, column_name in result:
+                        columns.setdefault(table_name, set()).add(column_name)
+
+                    result = await conn.execute(INDEXES_QUERY)
+                    indexes: Dict[str, set] = {}
+                    for table_name, index_name in result:
+                        indexes.setdefault(table_name, set()).add(index_name)
+
+                    policies = set(await conn.scalars(POLICIES_QUERY))
+
+                    result = await conn.execute(FOREIGN_KEYS_QUERY)
+                    fks = {tuple(row) for row in result}
+
+                self._snapshot = {
+                    "tables": set(rls),
+                    "columns": columns,
+                    "indexes": indexes,
+                    "policies": policies,
+                    "fks": fks,
+                    "rls": rls,
+                }
+            return self._snapshot
+
+    @staticmethod
+    async def _count_batch(conn, checks: List[tuple]) -> Dict[str, int]:
+        """Run several scalar COUNT queries in one round-trip using UNION ALL."""
+        sql = " UNION ALL ".join(
+            f"SELECT {i} AS k, ({query}) AS v" for i, (_, query) in enumerate(checks)
+        )
+        result = await conn.execute(text(sql))
+        counts = {k: v for k, v in result}
+        return {check_name: counts[i] for i, (check_name, _) in enumerate(checks)}
+
     async def _validate_schema_structure(self) -> Dict[str, Any]:
         """Validate that all required tables and columns exist."""
         required_tables = {
@@ -128,63 +278,43 @@ class MigrationValidator:
         }
 
         try:
-            engine = create_async_engine(self.db_url)
-            async with engine.connect() as conn:
-                all_tables = required_tables.copy()
-                all_tables.update(tenant_columns)
-
-                missing_tables = []
-                missing_columns = []
-
-                for table_name, expected_columns in all_tables.items():
-                    # Check if table exists
-                    result = await conn.execute(text(f"""
-                        SELECT EXISTS (
-                            SELECT 1 FROM information_schema.tables
-                            WHERE table_schema = 'public' AND table_name = '{table_name}'
-                        )
-                    """))
-                    table_exists = result.fetchone()[0]
-
-                    if not table_exists:
-                        missing_tables.append(table_name)
-                        continue
-
-                    # Check columns
-                    result = await conn.execute(text(f"""
-                        SELECT column_name FROM information_schema.columns
-                        WHERE table_schema = 'public' AND table_name = '{table_name}'
-                        ORDER BY column_name
-                    """))
-                    existing_columns = [row[0] for row in result.fetchall()]
-
-                    for expected_col in expected_columns:
-                        if expected_col not in existing_columns:
-                            missing_columns.append(f"{table_name}.{expected_col}")
-
-                await engine.dispose()
-
-                if missing_tables or missing_columns:
-                    message = ""
-                    if missing_tables:
-                        message += f"Missing tables: {missing_tables}. "
-                    if missing_columns:
-                        message += f"Missing columns: {missing_columns}."
-
-                    return {
-                        "status": "FAIL",
-                        "message": message,
-                        "missing_tables": missing_tables,
-                        "missing_columns": missing_columns
-                    }
+            snapshot = await self._schema_snapshot()
+            all_tables = required_tables.copy()
+            all_tables.update(tenant_columns)
+
+            existing_tables = snapshot["tables"]
+            existing_columns = snapshot["columns"]
+
+            missing_tables = [t for t in all_tables if t not in existing_tables]
+            missing_columns = [
+                f"{table_name}.{expected_col}"
+                for table_name, expected_columns in all_tables.items()
+                if table_name in existing_tables
+                for expected_col in expected_columns
+                if expected_col not in existing_columns.get(table_name, set())
+            ]
+
+            if missing_tables or missing_columns:
+                message = ""
+                if missing_tables:
+                    message += f"Missing tables: {missing_tables}. "
+                if missing_columns:
+                    message += f"Missing columns: {missing_columns}."
 
                 return {
-                    "status": "PASS",
-                    "message": "All required tables and columns present",
-                    "tables_validated": len(all_tables),
-                    "columns_validated": sum(len(cols) for cols in all_tables.values())
+                    "status": "FAIL",
+                    "message": message,
+                    "missing_tables": missing_tables,
+                    "missing_columns": missing_columns
                 }
 
+            return {
+                "status": "PASS",
+                "message": "All required tables and columns present",
+                "tables_validated": len(all_tables),
+                "columns_validated": sum(len(cols) for cols in all_tables.values())
+            }
+
         except Exception as e:
             return {
                 "status": "ERROR",
@@ -208,42 +338,46 @@ class MigrationValidator:
         ]
 
         try:
-            engine = create_async_engine(self.db_url)
-            async with engine.connect() as conn:
+            async with self._engine.connect() as conn:
                 invalid_relationships = []
 
+                existing_fks = (await self._schema_snapshot())["fks"]
+
+                # Identifiers cannot be bound as parameters, so only whitelisted
+                # tables are scanned and every name is quoted by the dialect.
+                quote = self._engine.dialect.identifier_preparer.quote
+                orphan_checks = []
                 for source, target in relationships:
                     source_table, source_col = source.split('.')
                     target_table, target_col = target.split('.')
 
-                    # Check if constraint exists
-                    result = await conn.execute(text(f"""
-                        SELECT EXISTS (
-                            SELECT 1 FROM information_schema.table_constraints tc
-                            JOIN information_schema.key_column_usage kcu ON tc.constraint_name = kcu.constraint_name
-                            WHERE tc.table_name = '{source_table}'
-                            AND kcu.column_name = '{source_col}'
-                            AND tc.constraint_type = 'FOREIGN KEY'
-                        )
-                    """))
-                    constraint_exists = result.fetchone()[0]
-
-                    if not constraint_exists:
+                    if (source_table, source_col, target_table, target_col) not in existing_fks:
                         invalid_relationships.append(f"Missing FK: {source} -> {target}")
 
                     # Check for orphaned records (sample check)
-                    if source_table in ['organization', 'subscription', 'usagemetric']:
-                        result = await conn.execute(text(f"""
-                            SELECT COUNT(*) FROM {source_table} t1
-                            LEFT JOIN {target_table} t2 ON t1.{source_col} = t2.{target_col}
-                            WHERE t2.{target_col} IS NULL AND t1.{source_col} IS NOT NULL
+                    if source_table in ORPHAN_CHECK_TABLES:
+                        # EXISTS stops at the first orphan instead of counting them all
+                        orphan_checks.append((source_table, f"""
+                            SELECT {len(orphan_checks)} AS k, EXISTS (
+                                SELECT 1 FROM {quote(source_table)} t1
+                                WHERE t1.{quote(source_col)} IS NOT NULL
+                                AND NOT EXISTS (
+                                    SELECT 1 FROM {quote(target_table)} t2
+                                    WHERE t2.{quote(target_col)} = t1.{quote(source_col)}
+                                )
+                            ) AS has_orphans
                         """))
-                        orphaned_count = result.fetchone()[0]
-
-                        if orphaned_count > 0:
-                            invalid_relationships.append(f"Orphaned records in {source_table}: {orphaned_count}")
 
-                await engine.dispose()
+                if orphan_checks:
+                    # One statement so the planner can schedule the anti-joins together
+                    result = await conn.execute(text(
+                        "WITH orphans AS ("
+                        + " UNION ALL ".join(query for _, query in orphan_checks)
+                        + ") SELECT k, has_orphans FROM orphans"
+                    ))
+                    for k, has_orphans in result:
+                        if has_orphans:
+                            invalid_relationships.append(f"Orphaned records in {orphan_checks[k][0]}")
 
                 if invalid_relationships:
                     return {
@@ -293,19 +427,14 @@ class MigrationValidator:
         ]
 
         try:
-            engine = create_async_engine(self.db_url)
-            async with engine.connect() as conn:
+            async with self._engine.connect() as conn:
                 integrity_issues = []
 
-                for check_name, query in integrity_checks:
-                    result = await conn.execute(text(query))
-                    issue_count = result.fetchone()[0]
-
+                counts = await self._count_batch(conn, integrity_checks)
+                for check_name, issue_count in counts.items():
                     if issue_count > 0:
                         integrity_issues.append(f"{check_name}: {issue_count} issues")
 
-                await engine.dispose()
-
                 if integrity_issues:
                     return {
                         "status": "FAIL",
@@ -338,57 +467,33 @@ class MigrationValidator:
         ]
 
         try:
-            engine = create_async_engine(self.db_url)
-            async with engine.connect() as conn:
-                missing_policies = []
-
-                for policy in required_policies:
-                    result = await conn.execute(text(f"""
-                        SELECT EXISTS (
-                            SELECT 1 FROM pg_policies
-                            WHERE schemaname = 'public' AND policyname = '{policy}'
-                        )
-                    """))
-                    policy_exists = result.fetchone()[0]
+            snapshot = await self._schema_snapshot()
+            missing_policies = [p for p in required_policies if p not in snapshot["policies"]]
 
-                    if not policy_exists:
-                        missing_policies.append(policy)
+            # Check if RLS is enabled on tables
+            tables = [p.replace('_isolation_policy', '') for p in required_policies]
+            tables_without_rls = [t for t in tables if t in snapshot["rls"] and not snapshot["rls"][t]]
 
-                # Check if RLS is enabled on tables
-                tables_without_rls = []
-                for table in [p.replace('_isolation_policy', '') for p in required_policies]:
-                    result = await conn.execute(text(f"""
-                        SELECT relrowsecurity FROM pg_class c
-                        JOIN pg_namespace n ON n.oid = c.relnamespace
-                        WHERE n.nspname = 'public' AND c.relname = '{table}'
-                    """))
-                    rls_enabled = result.fetchone()
-
-                    if rls_enabled and not rls_enabled[0]:
-                        tables_without_rls.append(table)
-
-                await engine.dispose()
-
-                issues = []
-                if missing_policies:
-                    issues.append(f"Missing RLS policies: {missing_policies}")
-                if tables_without_rls:
-                    issues.append(f"RLS not enabled on tables: {tables_without_rls}")
-
-                if issues:
-                    return {
-                        "status": "FAIL",
-                        "message": f"RLS configuration issues: {issues}",
-                        "missing_policies": missing_policies,
-                        "tables_without_rls": tables_without_rls
-                    }
+            issues = []
+            if missing_policies:
+                issues.append(f"Missing RLS policies: {missing_policies}")
+            if tables_without_rls:
+                issues.append(f"RLS not enabled on tables: {tables_without_rls}")
 
+            if issues:
                 return {
-                    "status": "PASS",
-                    "message": "RLS policies are properly configured",
-                    "policies_validated": len(required_policies)
+                    "status": "FAIL",
+                    "message": f"RLS configuration issues: {issues}",
+                    "missing_policies": missing_policies,
+                    "tables_without_rls": tables_without_rls
                 }
 
+            return {
+                "status": "PASS",
+                "message": "RLS policies are properly configured",
+                "policies_validated": len(required_policies)
+            }
+
         except Exception as e:
             return {
                 "status": "ERROR",
@@ -405,47 +510,34 @@ class MigrationValidator:
             ("invoice", ["stripe_invoice_id"]),
             ("usagemetric", ["metric_type"]),
             ("usagemetric", ["recorded_at"]),
-            ("flow", ["organization_id"]),
-            ("folder", ["organization_id"]),
-            ("apikey", ["organization_id"]),
-            ("variable", ["organization_id"]),
+            ("flow", ["organization_id", "id"]),
+            ("folder", ["organization_id", "id"]),
+            ("apikey", ["organization_id", "id"]),
+            ("variable", ["organization_id", "id"]),
         ]
 
         try:
-            engine = create_async_engine(self.db_url)
-            async with engine.connect() as conn:
-                missing_indexes = []
-
-                for table, columns in required_indexes:
-                    index_name = f"ix_{table}_{'_'.join(columns)}"
-                    result = await conn.execute(text(f"""
-                        SELECT EXISTS (
-                            SELECT 1 FROM pg_indexes
-                            WHERE schemaname = 'public'
-                            AND tablename = '{table}'
-                            AND indexname = '{index_name}'
-                        )
-                    """))
-                    index_exists = result.fetchone()[0]
-
-                    if not index_exists:
-                        missing_indexes.append(f"{table}: {columns}")
+            existing_indexes = (await self._schema_snapshot())["indexes"]
 
-                await engine.dispose()
-
-                if missing_indexes:
-                    return {
-                        "status": "WARN",
-                        "message": f"Missing performance indexes: {missing_indexes}",
-                        "missing_indexes": missing_indexes
-                    }
+            missing_indexes = [
+                f"{table}: {columns}"
+                for table, columns in required_indexes
+                if f"ix_{table}_{'_'.join(columns)}" not in existing_indexes.get(table, set())
+            ]
 
+            if missing_indexes:
                 return {
-                    "status": "PASS",
-                    "message": "All required indexes are present",
-                    "indexes_validated": len(required_indexes)
+                    "status": "WARN",
+                    "message": f"Missing performance indexes: {missing_indexes}",
+                    "missing_indexes": missing_indexes
                 }
 
+            return {
+                "status": "PASS",
+                "message": "All required indexes are present",
+                "indexes_validated": len(required_indexes)
+            }
+
         except Exception as e:
             return {
                 "status": "ERROR",
@@ -455,27 +547,13 @@ class MigrationValidator:
     async def _validate_default_data(self) -> Dict[str, Any]:
         """Validate that default data was inserted correctly."""
         try:
-            engine = create_async_engine(self.db_url)
-            async with engine.connect() as conn:
-                # Check default organization
-                result = await conn.execute(text("""
-                    SELECT COUNT(*) FROM organization WHERE slug = 'default-org'
-                """))
-                default_org_count = result.fetchone()[0]
-
-                # Check subscription plans
-                result = await conn.execute(text("""
-                    SELECT COUNT(*) FROM subscriptionplan
-                """))
-                plan_count = result.fetchone()[0]
-
-                # Check default plans data
-                result = await conn.execute(text("""
-                    SELECT name, plan_type, price FROM subscriptionplan ORDER BY price
-                """))
-                plans = result.fetchall()
-
-                await engine.dispose()
+            async with self._engine.connect() as conn:
+                # Check default organization and subscription plans in one round-trip
+                result = await conn.execute(DEFAULT_DATA_QUERY)
+                default_org_count, plans = result.one()
+                if isinstance(plans, str):
+                    plans = json.loads(plans)
+                plan_count = len(plans)
 
                 issues = []
 
@@ -486,19 +564,16 @@ class MigrationValidator:
                     issues.append(f"Expected 4 subscription plans, found {plan_count}")
 
                 expected_plans = [
-                    ("Free Plan", "free", 0),
-                    ("Basic Plan", "basic", 29),
-                    ("Professional Plan", "professional", 99),
-                    ("Enterprise Plan", "enterprise", 299)
+                    {"name": "Free Plan", "plan_type": "free", "price": 0},
+                    {"name": "Basic Plan", "plan_type": "basic", "price": 29},
+                    {"name": "Professional Plan", "plan_type": "professional", "price": 99},
+                    {"name": "Enterprise Plan", "plan_type": "enterprise", "price": 299}
                 ]
 
                 if len(plans) == 4:
-                    for i, (name, plan_type, price) in enumerate(plans):
-                        expected_name, expected_type, expected_price = expected_plans[i]
-                        if (name != expected_name or
-                            plan_type != expected_type or
-                            float(price) != expected_price):
-                            issues.append(f"Plan {i+1} data mismatch: expected {expected_plans[i]}, got {(name, plan_type, float(price))}")
+                    for i, (plan, expected_plan) in enumerate(zip(plans, expected_plans)):
+                        if plan != expected_plan:
+                            issues.append(f"Plan {i+1} data mismatch: expected {expected_plan}, got {plan}")
 
                 if issues:
                     return {
@@ -523,34 +598,26 @@ class MigrationValidator:
     async def _validate_performance_metrics(self) -> Dict[str, Any]:
         """Validate performance metrics for the migrated schema."""
         try:
-            engine = create_async_engine(self.db_url)
-            async with engine.connect() as conn:
-                # Check table sizes
-                result = await conn.execute(text("""
-                    SELECT
-                        schemaname,
-                        tablename,
-                        pg_size_pretty(pg_total_relation_size(schemaname||'.'||tablename)) as size
-                    FROM pg_tables
-                    WHERE schemaname = 'public'
-                    AND tablename IN ('organization', 'subscription', 'usagemetric', 'flow', 'folder')
-                    ORDER BY pg_total_relation_size(schemaname||'.'||tablename) DESC
-                """))
+            async with self._engine.connect() as conn:
+                # Check table sizes; reltuples is the planner's row estimate, so no table is scanned
+                result = await conn.execute(TABLE_SIZES_QUERY.bindparams(
+                    tables=["organization", "subscription", "usagemetric", "flow", "folder"]
+                ))
                 table_sizes = result.fetchall()
 
-                # Check query performance on common operations
+                # Check query plans on common operations; plain EXPLAIN plans without executing
                 performance_tests = [
                     ("Organization lookup by slug", """
-                        EXPLAIN ANALYZE SELECT * FROM organization WHERE slug = 'default-org'
+                        EXPLAIN (FORMAT JSON) SELECT * FROM organization WHERE slug = 'default-org'
                     """),
                     ("User subscriptions query", """
-                        EXPLAIN ANALYZE
+                        EXPLAIN (FORMAT JSON)
                         SELECT s.* FROM subscription s
                         JOIN organization o ON s.organization_id = o.id
                         WHERE o.owner_id = (SELECT id FROM "user" LIMIT 1)
                     """),
                     ("Usage aggregation query", """
-                        EXPLAIN ANALYZE
+                        EXPLAIN (FORMAT JSON)
                         SELECT organization_id, metric_type, SUM(value) as total
                         FROM usagemetric
                         GROUP BY organization_id, metric_type
@@ -559,20 +626,24 @@ class MigrationValidator:
 
                 performance_results = []
                 for test_name, query in performance_tests:
-                    # Note: In production, you'd want to parse EXPLAIN output
-                    # For now, just check if queries execute without error
                     try:
-                        await conn.execute(text(query))
-                        performance_results.append(f"{test_name}: OK")
+                        plan = await conn.scalar(text(query))
+                        if isinstance(plan, str):
+                            plan = json.loads(plan)
+                        root = plan[0]["Plan"]
+                        performance_results.append(
+                            f"{test_name}: OK - {root['Node Type']}, estimated cost {root['Total Cost']}"
+                        )
                     except Exception as e:
                         performance_results.append(f"{test_name}: FAILED - {str(e)}")
 
-                await engine.dispose()
-
                 return {
                     "status": "INFO",
                     "message": "Performance metrics collected",
-                    "table_sizes": [{"table": row[1], "size": row[2]} for row in table_sizes],
+                    "table_sizes": [
+                        {"table": relname, "size": size, "estimated_rows": estimated_rows}
+                        for relname, size, estimated_rows in table_sizes
+                    ],
                     "performance_tests": performance_results
                 }
 
@@ -623,19 +694,14 @@ class MigrationValidator:
         ]
 
         try:
-            engine = create_async_engine(self.db_url)
-            async with engine.connect() as conn:
+            async with self._engine.connect() as conn:
                 consistency_issues = []
 
-                for check_name, query in consistency_checks:
-                    result = await conn.execute(text(query))
-                    issue_count = result.fetchone()[0]
-
+                counts = await self._count_batch(conn, consistency_checks)
+                for check_name, issue_count in counts.items():
                     if issue_count > 0:
                         consistency_issues.append(f"{check_name}: {issue_count} inconsistencies")
 
-                await engine.dispose()
-
                 if consistency_issues:
                     return {
                         "status": "FAIL",
@@ -689,21 +755,31 @@ class MigrationValidator:
 
     def _calculate_overall_status(self) -> str:
         """Calculate overall validation status."""
-        results = self.results["validation_results"]
-
-        if any(result.get("status") == "ERROR" for result in results.values()):
-            return "ERROR"
-        elif any(result.get("status") == "FAIL" for result in results.values()):
-            return "FAIL"
-        elif any(result.get("status") == "WARN" for result in results.values()):
-            return "WARN"
-        else:
-            return "PASS"
+        severity = {"PASS": 0, "WARN": 1, "FAIL": 2, "ERROR": 3}
+        overall_status = "PASS"
 
-    def save_report(self, file_path: str):
+        # Single pass keeping the most severe status; ERROR cannot be exceeded
+        for result in self.results["validation_results"].values():
+            status = result.get("status")
+            if status == "ERROR":
+                return "ERROR"
+            if severity.get(status, 0) > severity[overall_status]:
+                overall_status = status
+
+        return overall_status
+
+    async def save_report(self, file_path: str):
         """Save validation results to a JSON file."""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            data = orjson.dumps(
+                self.results,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS,
+            )
+        else:
+            data = json.dumps(self.results, default=str, indent=2, ensure_ascii=False).encode("utf-8")
+        async with aiofiles.open(file_path, 'wb') as f:
+            await f.write(data)
         logger.info(f"📄 Validation report saved to: {file_path}")
 
 
@@ -713,18 +789,20 @@ async def main():
     parser.add_argument("--db-url", required=True, help="Database URL for validation")
     parser.add_argument("--comprehensive", action="store_true", help="Run comprehensive validation")
     parser.add_argument("--report-file", help="Save validation report to file")
+    parser.add_argument("--pool-size", type=int, default=20, help="Connection pool size for concurrent checks")
 
     args = parser.parse_args()
 
     validator = MigrationValidator(
         db_url=args.db_url,
-        comprehensive=args.comprehensive
+        comprehensive=args.comprehensive,
+        pool_size=args.pool_size
     )
 
     results = await validator.validate_all()
 
     if args.report_file:
-        validator.save_report(args.report_file)
+        await validator.save_report(args.report_file)
 
     # Exit with appropriate code
     status = results["overall_status"]
@@ -737,4 +815,9 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Add composite indexes for flow list and search queries
+
+Revision ID: mt003_flow_list_indexes
+Revises: mt002_multi_tenant_backfill
+Create Date: 2025-01-05 10:00:00.000000
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision = 'mt003_flow_list_indexes'
+down_revision = 'mt002_multi_tenant_backfill'
+branch_labels = None
+depends_on = None
+
+# (name, columns, partial predicate) for the btree indexes backing flow lists
+FLOW_LIST_INDEXES = [
+    ('ix_flow_org_user_folder_updated', ['organization_id', 'user_id', 'folder_id', 'updated_at'], None),
+    ('ix_flow_org_updated', ['organization_id', 'updated_at'], None),
+    ('ix_flow_public_updated', ['access_type', 'updated_at'], "access_type = 'PUBLIC'"),
+]
+
+# Trigram indexes serving ILIKE '%q%' searches on flow name and description
+FLOW_TRGM_INDEXES = {
+    'ix_flow_name_trgm': 'name',
+    'ix_flow_description_trgm': 'description',
+}
+
+
+def upgrade():
+    """Create the flow list indexes without blocking writes"""
+
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    if is_postgres:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with context.autocommit_block():
+        for name, columns, predicate in FLOW_LIST_INDEXES:
+            op.create_index(
+                name,
+                'flow',
+                columns,
+                postgresql_where=sa.text(predicate) if predicate else None,
+                postgresql_concurrently=True,
+            )
+
+        if is_postgres:
+            for name, column in FLOW_TRGM_INDEXES.items():
+                op.create_index(
+                    name,
+                    'flow',
+                    [column],
+                    postgresql_using='gin',
+                    postgresql_ops={column: 'gin_trgm_ops'},
+                    postgresql_concurrently=True,
+                )
+
+
+def downgrade():
+    """Drop the flow list indexes"""
+
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with context.autocommit_block():
+        if is_postgres:
+            for name in FLOW_TRGM_INDEXES:
+                op.drop_index(name, 'flow', postgresql_concurrently=True)
+
+        for name, _, _ in FLOW_LIST_INDEXES:
+            op.drop_index(name, 'flow', postgresql_concurrently=True)
@@ -0,0 +1,220 @@
+"""Finish organization_id backfill and index tenant tables by organization
+
+Revision ID: mt002_multi_tenant_backfill
+Revises: mt001a_organization_uuid
+Create Date: 2025-01-04 15:30:00.000000
+
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+
+# revision identifiers
+revision = 'mt002_multi_tenant_backfill'
+down_revision = 'mt001a_organization_uuid'
+branch_labels = None
+depends_on = None
+
+# Tables whose organization_id column is added by mt001_multi_tenant
+TENANT_TABLES = [
+    'flow', 'folder', 'apikey', 'variable',
+    'file', 'message', 'vertex_builds', 'transactions'
+]
+
+# Primary key column per tenant table, paired with organization_id in the
+# composite index that serves RLS-scoped lookups ordered or joined by key
+TENANT_TABLE_KEYS = {
+    'flow': 'id',
+    'folder': 'id',
+    'apikey': 'id',
+    'variable': 'id',
+    'file': 'id',
+    'message': 'id',
+    'vertex_builds': 'build_id',
+    'transactions': 'id',
+}
+
+# Time-ordered UUIDv7 built from gen_random_uuid(): the first 48 bits are
+# replaced with the Unix epoch in milliseconds and the version nibble is set
+# to 7, so new ids append to the right edge of their btree indexes
+UUID_V7_SQL = (
+    "encode(set_bit(set_bit(overlay(uuid_send(gen_random_uuid()) placing "
+    "substring(int8send(floor(extract(epoch from clock_timestamp()) * 1000)::bigint) from 3) "
+    "from 1 for 6), 52, 1), 53, 1), 'hex')::uuid"
+)
+
+# Rows updated per committed backfill batch
+BACKFILL_BATCH_SIZE = 10000
+
+# Tables backfilled concurrently, each over its own connection
+BACKFILL_WORKERS = 4
+
+
+def _backfill_sql(tables, organization_id):
+    """Build a DO block that backfills organization_id in committed batches.
+
+    The batch loop runs server-side, committing after each batch, so the block
+    must be executed outside a transaction block.
+    """
+    table_list = ", ".join(f"'{table}'" for table in tables)
+    return f"""
+        DO $$
+        DECLARE
+            tbl text;
+            updated integer;
+        BEGIN
+            FOREACH tbl IN ARRAY ARRAY[{table_list}] LOOP
+                LOOP
+                    EXECUTE format(
+                        'UPDATE %I SET organization_id = $1 WHERE ctid = ANY(ARRAY('
+                        'SELECT ctid FROM %I WHERE organization_id IS NULL LIMIT $2))',
+                        tbl, tbl
+                    ) USING '{organization_id}'::uuid, {BACKFILL_BATCH_SIZE};
+                    GET DIAGNOSTICS updated = ROW_COUNT;
+                    EXIT WHEN updated = 0;
+                    COMMIT;
+                END LOOP;
+            END LOOP;
+        END
+        $$;
+    """
+
+
+def _backfill_organization_id(organization_id):
+    """Assign organization_id to unowned rows of every tenant table.
+
+    The tables are disjoint, so on PostgreSQL each one is backfilled over its
+    own autocommit connection from a small thread pool. The migration already
+    runs inside an event loop, so every worker drives its own loop and engine.
+    """
+    url = op.get_bind().engine.url
+    if url.get_backend_name() != "postgresql" or not url.get_dialect().is_async:
+        op.execute(_backfill_sql(TENANT_TABLES, organization_id))
+        return
+
+    async def backfill_table(table):
+        engine = create_async_engine(url, isolation_level="AUTOCOMMIT", poolclass=NullPool)
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(sa.text(_backfill_sql([table], organization_id)))
+        finally:
+            await engine.dispose()
+
+    with ThreadPoolExecutor(max_workers=BACKFILL_WORKERS) as executor:
+        list(executor.map(lambda table: asyncio.run(backfill_table(table)), TENANT_TABLES))
+
+
+def upgrade():
+    """Backfill organization_id, enforce it NOT NULL and index it with each table's key.
+
+    mt001_multi_tenant already seeds the default organization and enforces
+    NOT NULL; every data step here is idempotent, so a database where mt001
+    was only partially applied or stamped is completed the same way.
+    """
+
+    # Migrate existing data: create default organization for existing users
+    # This ensures all existing data belongs to some organization
+    op.execute(f"""
+        -- Create a default organization for migration
+        INSERT INTO organization (id, name, slug, owner_id, created_at, updated_at)
+        SELECT 
+            {UUID_V7_SQL},
+            'Default Organization',
+            'default-org',
+            COALESCE(
+                (SELECT id FROM "user" WHERE is_superuser ORDER BY id LIMIT 1),
+                (SELECT id FROM "user" ORDER BY id LIMIT 1)
+            ),
+            now(),
+            now()
+        ON CONFLICT (slug) DO NOTHING;
+    """)
+
+    # Get the default organization ID once and backfill existing rows in
+    # independently committed batches to keep lock windows short
+    connection = op.get_bind()
+    default_org_id = connection.execute(
+        sa.text("SELECT id FROM organization WHERE slug = 'default-org' LIMIT 1")
+    ).scalar()
+    with context.autocommit_block():
+        _backfill_organization_id(default_org_id)
+
+    # Add all existing users to the default organization as owners; the
+    # anti-join skips existing members and the unique constraint keeps retries
+    # idempotent. Duplicate (organization, user) rows left by earlier seeds are
+    # removed first, keeping the earliest membership, so the constraint can be
+    # created.
+    op.execute("""
+        DELETE FROM organizationmember om
+        USING organizationmember keep
+        WHERE keep.organization_id = om.organization_id
+            AND keep.user_id = om.user_id
+            AND (keep.joined_at, keep.id) < (om.joined_at, om.id);
+    """)
+    op.create_unique_constraint(
+        'unique_member_per_org', 'organizationmember', ['organization_id', 'user_id']
+    )
+    op.execute(
+        sa.text(f"""
+            INSERT INTO organizationmember (id, organization_id, user_id, role, joined_at)
+            SELECT 
+                ({UUID_V7_SQL})::text,
+                :organization_id,
+                u.id,
+                'owner',
+                now()
+            FROM "user" u
+            LEFT JOIN organizationmember om
+                ON om.user_id = u.id AND om.organization_id = :organization_id
+            WHERE om.id IS NULL
+            ON CONFLICT (organization_id, user_id) DO NOTHING;
+        """).bindparams(organization_id=default_org_id)
+    )
+    
+    # Now make organization_id NOT NULL for all tables. A NOT VALID CHECK is
+    # added under a brief lock and validated with only SHARE UPDATE EXCLUSIVE;
+    # SET NOT NULL then uses the validated CHECK instead of scanning the table.
+    # Any organization foreign key still NOT VALID is validated the same way,
+    # each table in its own transaction.
+    for table in TENANT_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT ck_{table}_organization_id_not_null "
+            "CHECK (organization_id IS NOT NULL) NOT VALID;"
+        )
+    with context.autocommit_block():
+        for table in TENANT_TABLES:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT fk_{table}_organization_id;")
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT ck_{table}_organization_id_not_null;")
+    for table in TENANT_TABLES:
+        op.alter_column(table, 'organization_id', nullable=False)
+        op.drop_constraint(f'ck_{table}_organization_id_not_null', table, type_='check')
+
+    # Replace mt001's single-column organization_id indexes with
+    # (organization_id, key) indexes, without blocking writes; CONCURRENTLY
+    # cannot run inside a transaction block
+    with context.autocommit_block():
+        for table in TENANT_TABLES:
+            key = TENANT_TABLE_KEYS[table]
+            op.create_index(
+                f'ix_{table}_organization_id_{key}', table, ['organization_id', key], postgresql_concurrently=True
+            )
+            op.drop_index(f'ix_{table}_organization_id', table, postgresql_concurrently=True)
+
+
+def downgrade():
+    """Restore mt001's organization_id indexes and drop the member constraint"""
+
+    with context.autocommit_block():
+        for table in TENANT_TABLES:
+            key = TENANT_TABLE_KEYS[table]
+            op.create_index(
+                f'ix_{table}_organization_id', table, ['organization_id'], postgresql_concurrently=True
+            )
+            op.drop_index(f'ix_{table}_organization_id_{key}', table, postgresql_concurrently=True)
+
+    op.drop_constraint('unique_member_per_org', 'organizationmember', type_='unique')
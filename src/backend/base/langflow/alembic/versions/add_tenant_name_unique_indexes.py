@@ -0,0 +1,40 @@
+"""Add unique name indexes for tenant variables and folders
+
+Revision ID: mt004_tenant_name_unique
+Revises: mt003_flow_list_indexes
+Create Date: 2025-01-05 11:00:00.000000
+
+"""
+from alembic import context, op
+
+
+# revision identifiers
+revision = 'mt004_tenant_name_unique'
+down_revision = 'mt003_flow_list_indexes'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) of the unique indexes used as ON CONFLICT targets
+UNIQUE_NAME_INDEXES = [
+    ('unique_variable_name_per_org_user', 'variable', ['organization_id', 'user_id', 'name']),
+    ('unique_folder_name_per_org', 'folder', ['organization_id', 'name']),
+]
+
+
+def upgrade():
+    """Create the unique name indexes without blocking writes"""
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with context.autocommit_block():
+        for name, table, columns in UNIQUE_NAME_INDEXES:
+            op.create_index(
+                name, table, columns, unique=True, if_not_exists=True, postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    """Drop the unique name indexes"""
+
+    with context.autocommit_block():
+        for name, table, _ in UNIQUE_NAME_INDEXES:
+            op.drop_index(name, table, if_exists=True, postgresql_concurrently=True)
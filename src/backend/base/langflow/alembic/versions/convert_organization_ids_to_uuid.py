@@ -0,0 +1,91 @@
+"""Store organization ids as native uuid
+
+Revision ID: mt001a_organization_uuid
+Revises: mt001_multi_tenant
+Create Date: 2025-01-04 15:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision = 'mt001a_organization_uuid'
+down_revision = 'mt001_multi_tenant'
+branch_labels = None
+depends_on = None
+
+# Tables whose organization_id column references organization.id
+BILLING_TABLES = ['organizationmember', 'subscription', 'usagemetric']
+TENANT_TABLES = [
+    'flow', 'folder', 'apikey', 'variable',
+    'file', 'message', 'vertex_builds', 'transactions'
+]
+
+# Tenant isolation policy clauses. Without WITH CHECK a FOR ALL policy reuses
+# USING for writes; the scalar subselect is evaluated once per statement as an
+# InitPlan instead of once per row, and NULLIF keeps an unset context from
+# failing the uuid cast.
+UUID_POLICY = (
+    "USING (organization_id = (SELECT NULLIF(current_setting('app.current_organization_id', true), '')::uuid))"
+)
+# The text policy created by mt001_multi_tenant's setup_rls
+TEXT_POLICY = (
+    "USING (organization_id = current_setting('app.current_organization_id', true)::text) "
+    "WITH CHECK (organization_id = current_setting('app.current_organization_id', true)::text)"
+)
+
+
+def _organization_foreign_keys():
+    """Return (table, name, definition) of every foreign key referencing organization"""
+    return op.get_bind().execute(sa.text("""
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = 'organization'::regclass
+    """)).all()
+
+
+def _isolation_policy_tables():
+    """Return the tenant tables that carry an isolation policy"""
+    rows = op.get_bind().execute(sa.text("""
+        SELECT tablename FROM pg_policies
+        WHERE schemaname = current_schema()
+        AND policyname = tablename || '_isolation_policy'
+    """)).all()
+    return [row[0] for row in rows if row[0] in TENANT_TABLES]
+
+
+def _convert_organization_ids(type_, policy):
+    """Change organization.id and every organization_id column to the given type.
+
+    Foreign keys and isolation policies pin the column type, so they are
+    dropped first and recreated afterwards with the same names.
+    """
+    foreign_keys = _organization_foreign_keys()
+    policy_tables = _isolation_policy_tables()
+
+    for table in policy_tables:
+        op.execute(f"DROP POLICY {table}_isolation_policy ON {table};")
+    for table, name, _ in foreign_keys:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}";')
+
+    op.execute(f"ALTER TABLE organization ALTER COLUMN id TYPE {type_} USING id::{type_};")
+    for table in BILLING_TABLES + TENANT_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN organization_id TYPE {type_} USING organization_id::{type_};"
+        )
+
+    for table, name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition};')
+    for table in policy_tables:
+        op.execute(f"CREATE POLICY {table}_isolation_policy ON {table} FOR ALL TO public {policy};")
+
+
+def upgrade():
+    """Convert organization ids from text to uuid"""
+    _convert_organization_ids('uuid', UUID_POLICY)
+
+
+def downgrade():
+    """Convert organization ids back to text"""
+    _convert_organization_ids('text', TEXT_POLICY)
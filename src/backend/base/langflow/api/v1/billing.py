@@ -1,15 +1,19 @@
 """Billing and subscription management API endpoints"""
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import stripe
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, TypeAdapter, validator
+from sqlalchemy.exc import IntegrityError
 from sqlmodel.ext.asyncio import AsyncSession
 
 from langflow.api.utils import CurrentActiveUser, DbSession
 from langflow.services.billing.stripe_service import StripeService
-from langflow.services.billing.usage_service import UsageService
+from langflow.services.billing.usage_service import UsageService, get_usage_service
+from langflow.services.cache.services import get_cache_service_factory
 from langflow.services.database.models.subscription.crud import (
     OrganizationCRUD, SubscriptionCRUD, InvoiceCRUD, UsageMetricCRUD
 )
@@ -17,11 +21,22 @@ from langflow.services.database.models.subscription.model import (
     OrganizationCreate, OrganizationRead, SubscriptionPlanRead, 
     SubscriptionRead, UsageMetricRead, UsageSummary, MetricType
 )
-from langflow.services.deps import get_settings_service
+from langflow.services.deps import get_settings_service, session_scope
+from langflow.utils.compression import json_response
 
 router = APIRouter(tags=["Billing"], prefix="/billing")
 security = HTTPBearer()
 
+# 列表响应共用的已编译校验/序列化器
+_ORG_LIST_ADAPTER = TypeAdapter(List[OrganizationRead])
+_PLAN_LIST_ADAPTER = TypeAdapter(List[SubscriptionPlanRead])
+
+
+@lru_cache(maxsize=1)
+def get_stripe_service() -> StripeService:
+    """进程内复用的Stripe服务实例"""
+    return StripeService(get_settings_service())
+
 
 # Pydantic模型用于API请求
 class CreateSubscriptionRequest(BaseModel):
@@ -60,15 +75,8 @@ async def create_organization(
     session: DbSession
 ) -> OrganizationRead:
     """创建新组织"""
+    # 由slug唯一约束判定冲突，避免先查后插的竞态
     try:
-        # 检查slug是否已存在
-        existing_org = await OrganizationCRUD.get_organization_by_slug(session, request.slug)
-        if existing_org:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Organization slug already exists"
-            )
-        
         org = await OrganizationCRUD.create_organization(
             session=session,
             name=request.name,
@@ -76,14 +84,14 @@ async def create_organization(
             owner_id=str(current_user.id),
             description=request.description
         )
-        
-        return OrganizationRead.model_validate(org)
-        
-    except Exception as e:
+    except IntegrityError as e:
+        await session.rollback()
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create organization: {str(e)}"
-        )
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Organization slug already exists"
+        ) from e
+    
+    return OrganizationRead.model_validate(org)
 
 
 @router.get("/organizations", response_model=List[OrganizationRead])
@@ -92,14 +100,9 @@ async def list_user_organizations(
     session: DbSession
 ) -> List[OrganizationRead]:
     """获取用户所属的组织列表"""
-    try:
-        organizations = await OrganizationCRUD.get_user_organizations(session, str(current_user.id))
-        return [OrganizationRead.model_validate(org) for org in organizations]
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch organizations: {str(e)}"
-        )
+    organizations = await OrganizationCRUD.get_user_organizations(session, str(current_user.id))
+    items = _ORG_LIST_ADAPTER.validate_python(organizations, from_attributes=True)
+    return Response(content=_ORG_LIST_ADAPTER.dump_json(items), media_type="application/json")
 
 
 @router.get("/organizations/{org_id}", response_model=OrganizationRead)
@@ -109,45 +112,31 @@ async def get_organization(
     session: DbSession
 ) -> OrganizationRead:
     """获取组织详情"""
-    try:
-        org = await OrganizationCRUD.get_organization_by_id(session, org_id)
-        if not org:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Organization not found"
-            )
-        
-        # 检查用户是否有权限访问该组织
-        user_orgs = await OrganizationCRUD.get_user_organizations(session, str(current_user.id))
-        if org.id not in [user_org.id for user_org in user_orgs]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
-        
-        return OrganizationRead.model_validate(org)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+    # 仅返回用户所属的组织；非成员与不存在同样返回404，避免泄露组织是否存在
+    org = await OrganizationCRUD.get_accessible_org(session, org_id, str(current_user.id))
+    if not org:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch organization: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Organization not found"
         )
+    
+    return OrganizationRead.model_validate(org)
 
 
 # 订阅计划端点
 @router.get("/plans", response_model=List[SubscriptionPlanRead])
 async def list_subscription_plans(session: DbSession) -> List[SubscriptionPlanRead]:
     """获取可用的订阅计划列表"""
-    try:
-        plans = await SubscriptionCRUD.get_plans(session)
-        return [SubscriptionPlanRead.model_validate(plan) for plan in plans]
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch plans: {str(e)}"
-        )
+    # 计划很少变动，命中缓存时直接返回预序列化的JSON
+    billing_cache = (await get_cache_service_factory()).get_billing_cache()
+    cached = await billing_cache.get_plans()
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    plans = await SubscriptionCRUD.get_plans(session)
+    content = _PLAN_LIST_ADAPTER.dump_json(_PLAN_LIST_ADAPTER.validate_python(plans, from_attributes=True))
+    await billing_cache.set_plans(content)
+    return Response(content=content, media_type="application/json")
 
 
 # 订阅管理端点
@@ -156,45 +145,34 @@ async def create_subscription(
     org_id: str,
     request: CreateSubscriptionRequest,
     current_user: CurrentActiveUser,
-    session: DbSession
+    session: DbSession,
+    stripe_service: StripeService = Depends(get_stripe_service)
 ) -> Dict:
     """为组织创建订阅"""
-    try:
-        # 验证组织权限
-        org = await OrganizationCRUD.get_organization_by_id(session, org_id)
-        if not org:
-            raise HTTPException(status_code=404, detail="Organization not found")
-        
-        # 检查是否已有激活订阅
-        existing_sub = await SubscriptionCRUD.get_organization_subscription(session, org_id)
-        if existing_sub:
-            raise HTTPException(
-                status_code=400, 
-                detail="Organization already has an active subscription"
-            )
-        
-        # 创建Stripe服务实例
-        stripe_service = StripeService(get_settings_service())
-        
-        # 创建订阅
-        result = await stripe_service.create_subscription(
-            session=session,
-            organization_id=org_id,
-            plan_id=request.plan_id,
-            payment_method_id=request.payment_method_id,
-            trial_days=request.trial_days,
-            is_yearly=request.is_yearly
-        )
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+    # 验证组织权限
+    org = await OrganizationCRUD.get_organization_by_id(session, org_id)
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    
+    # 检查是否已有激活订阅
+    existing_sub = await SubscriptionCRUD.get_organization_subscription(session, org_id)
+    if existing_sub:
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to create subscription: {str(e)}"
+            status_code=400, 
+            detail="Organization already has an active subscription"
         )
+    
+    # 创建订阅
+    result = await stripe_service.create_subscription(
+        session=session,
+        organization_id=org_id,
+        plan_id=request.plan_id,
+        payment_method_id=request.payment_method_id,
+        trial_days=request.trial_days,
+        is_yearly=request.is_yearly
+    )
+    
+    return result
 
 
 @router.get("/organizations/{org_id}/subscription", response_model=SubscriptionRead)
@@ -204,23 +182,14 @@ async def get_organization_subscription(
     session: DbSession
 ) -> SubscriptionRead:
     """获取组织的当前订阅"""
-    try:
-        subscription = await SubscriptionCRUD.get_organization_subscription(session, org_id)
-        if not subscription:
-            raise HTTPException(
-                status_code=404,
-                detail="No active subscription found"
-            )
-        
-        return SubscriptionRead.model_validate(subscription)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+    subscription = await SubscriptionCRUD.get_organization_subscription(session, org_id)
+    if not subscription:
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to fetch subscription: {str(e)}"
+            status_code=404,
+            detail="No active subscription found"
         )
+    
+    return SubscriptionRead.model_validate(subscription)
 
 
 @router.put("/organizations/{org_id}/subscription")
@@ -228,82 +197,61 @@ async def update_subscription(
     org_id: str,
     request: UpdateSubscriptionRequest,
     current_user: CurrentActiveUser,
-    session: DbSession
+    session: DbSession,
+    stripe_service: StripeService = Depends(get_stripe_service)
 ) -> Dict:
     """更新组织订阅"""
-    try:
-        stripe_service = StripeService(get_settings_service())
-        
-        updated_subscription = await stripe_service.update_subscription(
-            session=session,
-            subscription_id=org_id,  # 这里需要调整逻辑
-            new_plan_id=request.plan_id,
-            proration_behavior=request.proration_behavior
-        )
-        
-        return {
-            "message": "Subscription updated successfully",
-            "subscription_id": updated_subscription.id
-        }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to update subscription: {str(e)}"
-        )
+    updated_subscription = await stripe_service.update_subscription(
+        session=session,
+        subscription_id=org_id,  # 这里需要调整逻辑
+        new_plan_id=request.plan_id,
+        proration_behavior=request.proration_behavior
+    )
+    
+    return {
+        "message": "Subscription updated successfully",
+        "subscription_id": updated_subscription.id
+    }
 
 
 @router.delete("/organizations/{org_id}/subscription")
 async def cancel_subscription(
+    *,
     org_id: str,
     cancel_immediately: bool = False,
     current_user: CurrentActiveUser,
-    session: DbSession
+    session: DbSession,
+    stripe_service: StripeService = Depends(get_stripe_service)
 ) -> Dict:
     """取消组织订阅"""
-    try:
-        stripe_service = StripeService(get_settings_service())
-        
-        updated_subscription = await stripe_service.cancel_subscription(
-            session=session,
-            subscription_id=org_id,  # 这里需要调整逻辑
-            cancel_immediately=cancel_immediately
-        )
-        
-        return {
-            "message": "Subscription canceled successfully",
-            "cancel_at_period_end": updated_subscription.cancel_at_period_end
-        }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to cancel subscription: {str(e)}"
-        )
+    updated_subscription = await stripe_service.cancel_subscription(
+        session=session,
+        subscription_id=org_id,  # 这里需要调整逻辑
+        cancel_immediately=cancel_immediately
+    )
+    
+    return {
+        "message": "Subscription canceled successfully",
+        "cancel_at_period_end": updated_subscription.cancel_at_period_end
+    }
 
 
 # 使用量追踪端点
 @router.get("/organizations/{org_id}/usage", response_model=UsageSummary)
 async def get_usage_summary(
+    *,
     org_id: str,
     period_start: Optional[datetime] = None,
     period_end: Optional[datetime] = None,
     current_user: CurrentActiveUser,
-    session: DbSession
+    session: DbSession,
+    usage_service: UsageService = Depends(get_usage_service)
 ) -> UsageSummary:
     """获取组织使用量汇总"""
-    try:
-        usage_service = UsageService()
-        summary = await usage_service.get_usage_summary(
-            session, org_id, period_start, period_end
-        )
-        return summary
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to fetch usage summary: {str(e)}"
-        )
+    summary = await usage_service.get_usage_summary(
+        session, org_id, period_start, period_end
+    )
+    return summary
 
 
 @router.post("/organizations/{org_id}/usage/track")
@@ -311,117 +259,77 @@ async def track_usage(
     org_id: str,
     request: UsageTrackingRequest,
     current_user: CurrentActiveUser,
-    session: DbSession
+    session: DbSession,
+    usage_service: UsageService = Depends(get_usage_service)
 ) -> Dict:
     """手动追踪使用量（主要用于测试）"""
-    try:
-        usage_service = UsageService()
-        success = await usage_service._track_usage(
-            session, org_id, request.metric_type, request.value, request.metadata
-        )
-        
-        return {
-            "success": success,
-            "metric_type": request.metric_type.value,
-            "value": request.value
-        }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to track usage: {str(e)}"
-        )
+    success = await usage_service._track_usage(
+        session, org_id, request.metric_type, request.value, request.metadata
+    )
+    
+    return {
+        "success": success,
+        "metric_type": request.metric_type.value,
+        "value": request.value
+    }
 
 
 @router.get("/organizations/{org_id}/usage/quota")
 async def check_quota(
+    *,
     org_id: str,
     metric_type: MetricType,
     requested_amount: int = 1,
     current_user: CurrentActiveUser,
-    session: DbSession
+    session: DbSession,
+    usage_service: UsageService = Depends(get_usage_service)
 ) -> Dict:
     """检查组织配额"""
-    try:
-        usage_service = UsageService()
-        can_use, quota_info = await usage_service.check_quota(
-            session, org_id, metric_type, requested_amount
-        )
-        
-        return {
-            "can_use": can_use,
-            "quota_info": quota_info
-        }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to check quota: {str(e)}"
-        )
+    can_use, quota_info = await usage_service.check_quota(
+        session, org_id, metric_type, requested_amount
+    )
+    
+    return {
+        "can_use": can_use,
+        "quota_info": quota_info
+    }
 
 
 @router.get("/organizations/{org_id}/usage/alerts")
 async def get_quota_alerts(
+    *,
     org_id: str,
     warning_threshold: float = 0.8,
     current_user: CurrentActiveUser,
-    session: DbSession
+    session: DbSession,
+    usage_service: UsageService = Depends(get_usage_service)
 ) -> Dict:
     """获取配额告警"""
-    try:
-        usage_service = UsageService()
-        alerts = await usage_service.get_quota_alerts(
-            session, org_id, warning_threshold
-        )
-        
-        return {
-            "alerts": alerts,
-            "alert_count": len(alerts),
-            "has_critical": any(alert['severity'] == 'critical' for alert in alerts)
-        }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to fetch quota alerts: {str(e)}"
-        )
+    alerts = await usage_service.get_quota_alerts(
+        session, org_id, warning_threshold
+    )
+    
+    return {
+        "alerts": alerts,
+        "alert_count": len(alerts),
+        # 遇到第一条严重告警即停止
+        "has_critical": any(alert['severity'] == 'critical' for alert in alerts)
+    }
 
 
 # 发票和计费端点
 @router.get("/organizations/{org_id}/invoices")
 async def list_invoices(
+    *,
     org_id: str,
     limit: int = 50,
     current_user: CurrentActiveUser,
     session: DbSession
-) -> Dict:
+) -> Response:
     """获取组织发票列表"""
-    try:
-        invoices = await InvoiceCRUD.get_organization_invoices(session, org_id, limit)
-        
-        return {
-            "invoices": [
-                {
-                    "id": invoice.id,
-                    "invoice_number": invoice.invoice_number,
-                    "amount": float(invoice.amount),
-                    "currency": invoice.currency,
-                    "status": invoice.status,
-                    "period_start": invoice.period_start,
-                    "period_end": invoice.period_end,
-                    "created_at": invoice.created_at,
-                    "hosted_invoice_url": invoice.hosted_invoice_url
-                }
-                for invoice in invoices
-            ],
-            "total": len(invoices)
-        }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to fetch invoices: {str(e)}"
-        )
+    rows = await InvoiceCRUD.list_invoice_rows(session, org_id, limit)
+    
+    return json_response({"invoices": rows, "total": len(rows)})
 
 
 @router.post("/organizations/{org_id}/billing-portal")
@@ -429,63 +337,62 @@ async def create_billing_portal_session(
     org_id: str,
     request: BillingPortalRequest,
     current_user: CurrentActiveUser,
-    session: DbSession
+    session: DbSession,
+    stripe_service: StripeService = Depends(get_stripe_service)
 ) -> Dict:
     """创建Stripe客户门户会话"""
-    try:
-        # 获取组织的Stripe客户ID
-        subscription = await SubscriptionCRUD.get_organization_subscription(session, org_id)
-        if not subscription or not subscription.stripe_customer_id:
-            raise HTTPException(
-                status_code=400,
-                detail="No billing customer found"
-            )
-        
-        stripe_service = StripeService(get_settings_service())
-        portal_session = await stripe_service.create_billing_portal_session(
-            subscription.stripe_customer_id,
-            request.return_url
-        )
-        
-        return {"url": portal_session.url}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+    # 获取组织的Stripe客户ID
+    subscription = await SubscriptionCRUD.get_organization_subscription(session, org_id)
+    if not subscription or not subscription.stripe_customer_id:
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to create billing portal session: {str(e)}"
+            status_code=400,
+            detail="No billing customer found"
         )
+    
+    # 结束只读事务，调用Stripe API期间将数据库连接归还连接池
+    await session.commit()
+    
+    portal_session = await stripe_service.create_billing_portal_session(
+        subscription.stripe_customer_id,
+        request.return_url
+    )
+    
+    return {"url": portal_session.url}
 
 
 # Stripe Webhook端点
 @router.post("/webhooks/stripe")
 async def stripe_webhook(
     request: Request,
-    session: DbSession,
-    stripe_signature: str = Depends(lambda request: request.headers.get("stripe-signature"))
+    background_tasks: BackgroundTasks,
+    stripe_signature: Optional[str] = Header(default=None, alias="stripe-signature"),
+    stripe_service: StripeService = Depends(get_stripe_service)
 ) -> Dict:
     """处理Stripe webhook事件"""
-    try:
-        if not stripe_signature:
-            raise HTTPException(
-                status_code=400,
-                detail="Missing stripe-signature header"
-            )
-        
-        # 读取请求体
-        payload = await request.body()
-        
-        # 处理webhook
-        stripe_service = StripeService(get_settings_service())
-        result = await stripe_service.handle_webhook(
-            payload, stripe_signature, session
+    if not stripe_signature:
+        raise HTTPException(
+            status_code=400,
+            detail="Missing stripe-signature header"
         )
-        
-        return result
-        
-    except Exception as e:
+    
+    # 读取请求体
+    payload = await request.body()
+    
+    # 先验证签名（不占用数据库连接），无效请求直接返回400
+    try:
+        event = stripe_service.construct_event(payload, stripe_signature)
+    except (stripe.error.SignatureVerificationError, ValueError) as e:
         raise HTTPException(
             status_code=400,
             detail=f"Webhook processing failed: {str(e)}"
-        )
\ No newline at end of file
+        ) from e
+    
+    # 验证通过后立即确认，事件在后台使用独立会话处理
+    background_tasks.add_task(_process_stripe_event, stripe_service, event)
+    return {"status": "accepted", "event_type": event["type"]}
+
+
+async def _process_stripe_event(stripe_service: StripeService, event) -> None:
+    """在独立数据库会话中处理已验证的Stripe事件"""
+    async with session_scope() as session:
+        await stripe_service.process_event(event, session)
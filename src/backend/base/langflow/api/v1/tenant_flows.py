@@ -1,21 +1,19 @@
 """Multi-tenant aware Flow API endpoints"""
 from __future__ import annotations
 
+import base64
+import binascii
 import io
-import json
 import zipfile
 from datetime import datetime, timezone
 from typing import Annotated, Optional
 from uuid import UUID
 
 import orjson
-from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, Request
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, Request
 from fastapi.responses import StreamingResponse
-from fastapi_pagination import Page, Params
-from fastapi_pagination.ext.sqlmodel import apaginate
-from sqlmodel import select
-from sqlmodel.ext.asyncio.session import AsyncSession
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy.exc import IntegrityError
 
 from langflow.api.utils import CurrentActiveUser, DbSession, remove_api_keys
 from langflow.api.v1.schemas import FlowListCreate
@@ -27,11 +25,87 @@ from langflow.services.database.models.flow.model import (
     FlowUpdate,
 )
 from langflow.services.database.models.flow.crud import FlowCRUD
-from langflow.utils.compression import compress_response
+from langflow.services.deps import get_settings_service
 
 # build router
 router = APIRouter(prefix="/tenant/flows", tags=["Tenant Flows"])
 
+# One compiled validator/serializer shared by every flow list response
+_FLOW_LIST_ADAPTER = TypeAdapter(list[FlowRead])
+# Validates the "flows" array of an uploaded file without building a FlowListCreate
+_FLOW_CREATE_LIST_ADAPTER = TypeAdapter(list[FlowCreate])
+
+
+def _flow_list_response(flows) -> Response:
+    """Validate and serialize a list of flows in a single pass, bypassing FastAPI re-serialization."""
+    items = _FLOW_LIST_ADAPTER.validate_python(flows, from_attributes=True)
+    return Response(content=_FLOW_LIST_ADAPTER.dump_json(items), media_type="application/json")
+
+
+class FlowCursorPage(BaseModel):
+    """A page of flows plus the opaque cursor for the next page, if any."""
+
+    items: list[FlowRead]
+    next_cursor: str | None = None
+
+
+def _encode_flow_cursor(flow: Flow) -> str:
+    """Encode the (updated_at, id) keyset position of a flow as an opaque cursor.
+
+    A NULL ``updated_at`` is encoded as ``null`` and sorts after every timestamp.
+    """
+    payload = orjson.dumps({"updated_at": flow.updated_at, "id": flow.id})
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def _decode_flow_cursor(cursor: str) -> tuple[datetime | None, UUID]:
+    """Decode a cursor produced by _encode_flow_cursor."""
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        updated_at = payload["updated_at"]
+        if updated_at is not None:
+            updated_at = datetime.fromisoformat(updated_at)
+        return updated_at, UUID(payload["id"])
+    except (AttributeError, binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+class _ZipChunkWriter(io.RawIOBase):
+    """Write-only, non-seekable sink that hands ZIP bytes out as they are produced."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
+
+
+def _iter_flows_zip(flows: list[Flow]):
+    """Yield a deflated ZIP of the flows one member at a time.
+
+    ZipFile falls back to data descriptors on a non-seekable sink, so memory
+    stays bounded by a single compressed member instead of the whole archive.
+    StreamingResponse iterates sync generators in a worker thread, so dumping,
+    key stripping and compression all stay off the event loop.
+    """
+    sink = _ZipChunkWriter()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zip_file:
+        for flow_model in flows:
+            flow = remove_api_keys(flow_model.model_dump())
+            flow_json = orjson.dumps(flow, default=str, option=orjson.OPT_NAIVE_UTC)
+            zip_file.writestr(f"{flow['name']}.json", flow_json)
+            yield sink.drain()
+    yield sink.drain()
+
 
 @router.post("/", response_model=FlowRead, status_code=201)
 async def create_flow(
@@ -50,51 +124,60 @@ async def create_flow(
             user_id=str(current_user.id)
         )
         return db_flow
-    except Exception as e:
-        if "unique constraint" in str(e).lower():
-            raise HTTPException(
-                status_code=400,
-                detail="Flow name must be unique within the organization"
-            ) from e
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=400,
+            detail="Flow name must be unique within the organization"
+        ) from e
 
 
-@router.get("/", response_model=list[FlowRead] | Page[FlowRead], status_code=200)
+@router.get("/", response_model=list[FlowRead] | FlowCursorPage, status_code=200)
 async def read_flows(
     *,
     session: DbSession,
     current_user: CurrentActiveUser,
     organization_id: str = Depends(require_organization_context),
     folder_id: Optional[UUID] = None,
-    limit: int = 50,
-    offset: int = 0,
-    params: Annotated[Params, Depends()] = None,
+    limit: Annotated[int, Query(ge=1)] = 50,
+    offset: Annotated[int, Query(ge=0, deprecated=True)] = 0,
+    use_cursor: bool = False,
+    cursor: Optional[str] = None,
 ):
-    """Retrieve flows in the current organization."""
-    try:
-        if folder_id:
-            # Get flows in specific folder
-            flows = await FlowCRUD.get_flows_by_user(
-                session=session,
-                user_id=str(current_user.id),
-                organization_id=organization_id,
-                folder_id=str(folder_id),
-                limit=limit,
-                offset=offset
-            )
-        else:
-            # Get all user flows in organization
-            flows = await FlowCRUD.get_flows_by_user(
-                session=session,
-                user_id=str(current_user.id),
-                organization_id=organization_id,
-                limit=limit,
-                offset=offset
-            )
-        
-        return compress_response([FlowRead.model_validate(flow, from_attributes=True) for flow in flows])
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    """Retrieve flows in the current organization.
+
+    By default this returns a bare list paged with the deprecated ``offset``.
+    Pass ``use_cursor=true`` (or a ``cursor``) to get ``{items, next_cursor}``
+    pages keyed on (updated_at, id); pass the returned ``next_cursor`` to fetch
+    the following page.
+    """
+    if not use_cursor and cursor is None:
+        flows = await FlowCRUD.get_flows_by_user(
+            session=session,
+            user_id=str(current_user.id),
+            organization_id=organization_id,
+            folder_id=str(folder_id) if folder_id else None,
+            limit=limit,
+            offset=offset,
+        )
+        return _flow_list_response(flows)
+
+    if offset:
+        raise HTTPException(status_code=400, detail="cursor pagination cannot be combined with offset")
+
+    # Fetch one extra row to learn whether another page follows
+    flows = await FlowCRUD.get_flows_by_user(
+        session=session,
+        user_id=str(current_user.id),
+        organization_id=organization_id,
+        folder_id=str(folder_id) if folder_id else None,
+        limit=limit + 1,
+        after=_decode_flow_cursor(cursor) if cursor else None,
+    )
+    next_cursor = _encode_flow_cursor(flows[limit - 1]) if len(flows) > limit else None
+    page = FlowCursorPage.model_validate(
+        {"items": flows[:limit], "next_cursor": next_cursor}, from_attributes=True
+    )
+    return Response(content=page.model_dump_json(), media_type="application/json")
 
 
 @router.get("/organization", response_model=list[FlowRead], status_code=200)
@@ -107,17 +190,14 @@ async def read_organization_flows(
     search_query: Optional[str] = None,
 ):
     """Retrieve all flows in the organization (admin view)."""
-    try:
-        flows = await FlowCRUD.get_organization_flows(
-            session=session,
-            organization_id=organization_id,
-            limit=limit,
-            offset=offset,
-            search_query=search_query
-        )
-        return compress_response([FlowRead.model_validate(flow, from_attributes=True) for flow in flows])
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    flows = await FlowCRUD.get_organization_flows(
+        session=session,
+        organization_id=organization_id,
+        limit=limit,
+        offset=offset,
+        search_query=search_query
+    )
+    return _flow_list_response(flows)
 
 
 @router.get("/public", response_model=list[FlowRead], status_code=200)
@@ -128,15 +208,12 @@ async def read_public_flows(
     offset: int = 0,
 ):
     """Retrieve public flows (cross-organization)."""
-    try:
-        flows = await FlowCRUD.get_public_flows(
-            session=session,
-            limit=limit,
-            offset=offset
-        )
-        return compress_response([FlowRead.model_validate(flow, from_attributes=True) for flow in flows])
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    flows = await FlowCRUD.get_public_flows(
+        session=session,
+        limit=limit,
+        offset=offset
+    )
+    return _flow_list_response(flows)
 
 
 @router.get("/search", response_model=list[FlowRead], status_code=200)
@@ -151,18 +228,15 @@ async def search_flows(
     limit: int = 20,
 ):
     """Search flows within organization and optionally include public flows."""
-    try:
-        flows = await FlowCRUD.search_flows(
-            session=session,
-            organization_id=organization_id,
-            query=query,
-            user_id=user_id or str(current_user.id),
-            include_public=include_public,
-            limit=limit
-        )
-        return compress_response([FlowRead.model_validate(flow, from_attributes=True) for flow in flows])
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    flows = await FlowCRUD.search_flows(
+        session=session,
+        organization_id=organization_id,
+        query=query,
+        user_id=user_id or str(current_user.id),
+        include_public=include_public,
+        limit=limit
+    )
+    return _flow_list_response(flows)
 
 
 @router.get("/statistics", response_model=dict, status_code=200)
@@ -172,14 +246,11 @@ async def get_flow_statistics(
     organization_id: str = Depends(require_organization_context),
 ):
     """Get organization flow statistics."""
-    try:
-        stats = await FlowCRUD.get_flow_statistics(
-            session=session,
-            organization_id=organization_id
-        )
-        return stats
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    stats = await FlowCRUD.get_flow_statistics(
+        session=session,
+        organization_id=organization_id
+    )
+    return stats
 
 
 @router.get("/{flow_id}", response_model=FlowRead, status_code=200)
@@ -190,19 +261,14 @@ async def read_flow(
     organization_id: str = Depends(require_organization_context),
 ):
     """Read a specific flow."""
-    try:
-        flow = await FlowCRUD.get_flow_by_id(
-            session=session,
-            flow_id=flow_id,
-            organization_id=organization_id
-        )
-        if not flow:
-            raise HTTPException(status_code=404, detail="Flow not found")
-        return FlowRead.model_validate(flow, from_attributes=True)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    flow = await FlowCRUD.get_flow_by_id(
+        session=session,
+        flow_id=flow_id,
+        organization_id=organization_id
+    )
+    if not flow:
+        raise HTTPException(status_code=404, detail="Flow not found")
+    return FlowRead.model_validate(flow, from_attributes=True)
 
 
 @router.patch("/{flow_id}", response_model=FlowRead, status_code=200)
@@ -221,18 +287,14 @@ async def update_flow(
             flow_update=flow_update,
             organization_id=organization_id
         )
-        if not updated_flow:
-            raise HTTPException(status_code=404, detail="Flow not found")
-        return FlowRead.model_validate(updated_flow, from_attributes=True)
-    except HTTPException:
-        raise
-    except Exception as e:
-        if "unique constraint" in str(e).lower():
-            raise HTTPException(
-                status_code=400,
-                detail="Flow name or endpoint name must be unique within the organization"
-            ) from e
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=400,
+            detail="Flow name or endpoint name must be unique within the organization"
+        ) from e
+    if not updated_flow:
+        raise HTTPException(status_code=404, detail="Flow not found")
+    return FlowRead.model_validate(updated_flow, from_attributes=True)
 
 
 @router.delete("/{flow_id}", status_code=200)
@@ -243,19 +305,14 @@ async def delete_flow(
     organization_id: str = Depends(require_organization_context),
 ):
     """Delete a flow."""
-    try:
-        success = await FlowCRUD.delete_flow(
-            session=session,
-            flow_id=flow_id,
-            organization_id=organization_id
-        )
-        if not success:
-            raise HTTPException(status_code=404, detail="Flow not found")
-        return {"message": "Flow deleted successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    success = await FlowCRUD.delete_flow(
+        session=session,
+        flow_id=flow_id,
+        organization_id=organization_id
+    )
+    if not success:
+        raise HTTPException(status_code=404, detail="Flow not found")
+    return {"message": "Flow deleted successfully"}
 
 
 @router.post("/{flow_id}/duplicate", response_model=FlowRead, status_code=201)
@@ -269,22 +326,17 @@ async def duplicate_flow(
     target_folder_id: Optional[str] = None,
 ):
     """Duplicate a flow within the current organization."""
-    try:
-        duplicated_flow = await FlowCRUD.duplicate_flow(
-            session=session,
-            flow_id=flow_id,
-            new_name=new_name,
-            organization_id=organization_id,
-            user_id=str(current_user.id),
-            target_folder_id=target_folder_id
-        )
-        if not duplicated_flow:
-            raise HTTPException(status_code=404, detail="Flow not found or duplication failed")
-        return FlowRead.model_validate(duplicated_flow, from_attributes=True)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    duplicated_flow = await FlowCRUD.duplicate_flow(
+        session=session,
+        flow_id=flow_id,
+        new_name=new_name,
+        organization_id=organization_id,
+        user_id=str(current_user.id),
+        target_folder_id=target_folder_id
+    )
+    if not duplicated_flow:
+        raise HTTPException(status_code=404, detail="Flow not found or duplication failed")
+    return FlowRead.model_validate(duplicated_flow, from_attributes=True)
 
 
 @router.patch("/{flow_id}/move", response_model=FlowRead, status_code=200)
@@ -296,20 +348,15 @@ async def move_flow_to_folder(
     organization_id: str = Depends(require_organization_context),
 ):
     """Move a flow to a different folder."""
-    try:
-        moved_flow = await FlowCRUD.move_flow_to_folder(
-            session=session,
-            flow_id=flow_id,
-            target_folder_id=target_folder_id,
-            organization_id=organization_id
-        )
-        if not moved_flow:
-            raise HTTPException(status_code=404, detail="Flow not found or move operation failed")
-        return FlowRead.model_validate(moved_flow, from_attributes=True)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    moved_flow = await FlowCRUD.move_flow_to_folder(
+        session=session,
+        flow_id=flow_id,
+        target_folder_id=target_folder_id,
+        organization_id=organization_id
+    )
+    if not moved_flow:
+        raise HTTPException(status_code=404, detail="Flow not found or move operation failed")
+    return FlowRead.model_validate(moved_flow, from_attributes=True)
 
 
 @router.post("/batch/", response_model=list[FlowRead], status_code=201)
@@ -322,19 +369,18 @@ async def create_flows(
 ):
     """Create multiple flows."""
     try:
-        created_flows = []
-        for flow_data in flow_list.flows:
-            flow = await FlowCRUD.create_flow(
-                session=session,
-                flow_data=flow_data,
-                organization_id=organization_id,
-                user_id=str(current_user.id)
-            )
-            created_flows.append(flow)
-        
-        return [FlowRead.model_validate(flow, from_attributes=True) for flow in created_flows]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+        created_flows = await FlowCRUD.create_flows_bulk(
+            session=session,
+            flows_data=flow_list.flows,
+            organization_id=organization_id,
+            user_id=str(current_user.id)
+        )
+        return _FLOW_LIST_ADAPTER.validate_python(created_flows, from_attributes=True)
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=400,
+            detail="One or more flow names already exist in the organization"
+        ) from e
 
 
 @router.post("/upload/", response_model=list[FlowRead], status_code=201)
@@ -344,83 +390,80 @@ async def upload_file(
     file: Annotated[UploadFile, File(...)],
     current_user: CurrentActiveUser,
     organization_id: str = Depends(require_organization_context),
-    folder_id: Optional[str] = None,
+    folder_id: Optional[UUID] = None,
 ):
     """Upload flows from a file."""
+    max_file_size_upload = get_settings_service().settings.max_file_size_upload
+    max_upload_bytes = max_file_size_upload * 1024 * 1024
+    size_error = HTTPException(
+        status_code=413, detail=f"File size is larger than the maximum file size {max_file_size_upload}MB."
+    )
+    if file.size and file.size > max_upload_bytes:
+        raise size_error
+
+    # Read at most one byte past the limit so an undeclared oversized body is still rejected
+    contents = await file.read(max_upload_bytes + 1)
+    if len(contents) > max_upload_bytes:
+        raise size_error
+
     try:
-        contents = await file.read()
         data = orjson.loads(contents)
-        
-        flow_list = FlowListCreate(**data) if "flows" in data else FlowListCreate(flows=[FlowCreate(**data)])
-        created_flows = []
-        
-        for flow_data in flow_list.flows:
-            if folder_id:
-                flow_data.folder_id = UUID(folder_id)
-            
-            flow = await FlowCRUD.create_flow(
-                session=session,
-                flow_data=flow_data,
-                organization_id=organization_id,
-                user_id=str(current_user.id)
-            )
-            created_flows.append(flow)
-        
-        return [FlowRead.model_validate(flow, from_attributes=True) for flow in created_flows]
-    except Exception as e:
-        if "unique constraint" in str(e).lower():
-            raise HTTPException(
-                status_code=400,
-                detail="One or more flow names already exist in the organization"
-            ) from e
-        raise HTTPException(status_code=500, detail=str(e)) from e
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail="Uploaded file is not valid JSON") from e
+
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Uploaded file must contain a JSON object")
+
+    try:
+        if "flows" in data:
+            flows_data = _FLOW_CREATE_LIST_ADAPTER.validate_python(data["flows"])
+        else:
+            flows_data = [FlowCreate.model_validate(data)]
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False)) from e
+    if folder_id:
+        for flow_data in flows_data:
+            flow_data.folder_id = folder_id
+
+    try:
+        created_flows = await FlowCRUD.create_flows_bulk(
+            session=session,
+            flows_data=flows_data,
+            organization_id=organization_id,
+            user_id=str(current_user.id)
+        )
+        return _FLOW_LIST_ADAPTER.validate_python(created_flows, from_attributes=True)
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=400,
+            detail="One or more flow names already exist in the organization"
+        ) from e
 
 
 @router.post("/download/", status_code=200)
 async def download_flows(
-    flow_ids: list[str],
+    flow_ids: list[UUID],
     session: DbSession,
     organization_id: str = Depends(require_organization_context),
 ):
     """Download flows as ZIP file."""
-    try:
-        flows = []
-        for flow_id in flow_ids:
-            flow = await FlowCRUD.get_flow_by_id(
-                session=session,
-                flow_id=flow_id,
-                organization_id=organization_id
-            )
-            if flow:
-                flows.append(flow)
-        
-        if not flows:
-            raise HTTPException(status_code=404, detail="No flows found.")
+    flows = await FlowCRUD.get_flows_by_ids(
+        session=session,
+        flow_ids=flow_ids,
+        organization_id=organization_id
+    )
+    
+    if not flows:
+        raise HTTPException(status_code=404, detail="No flows found.")
+    
+    if len(flows) > 1:
+        current_time = datetime.now(tz=timezone.utc).astimezone().strftime("%Y%m%d_%H%M%S")
+        filename = f"{current_time}_langflow_flows.zip"
         
-        flows_without_api_keys = [remove_api_keys(flow.model_dump()) for flow in flows]
-        
-        if len(flows_without_api_keys) > 1:
-            # Create ZIP file
-            zip_stream = io.BytesIO()
-            
-            with zipfile.ZipFile(zip_stream, "w") as zip_file:
-                for flow in flows_without_api_keys:
-                    flow_json = json.dumps(jsonable_encoder(flow))
-                    zip_file.writestr(f"{flow['name']}.json", flow_json)
-            
-            zip_stream.seek(0)
-            
-            current_time = datetime.now(tz=timezone.utc).astimezone().strftime("%Y%m%d_%H%M%S")
-            filename = f"{current_time}_langflow_flows.zip"
-            
-            return StreamingResponse(
-                zip_stream,
-                media_type="application/x-zip-compressed",
-                headers={"Content-Disposition": f"attachment; filename={filename}"},
-            )
-        
-        return flows_without_api_keys[0]
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
\ No newline at end of file
+        return StreamingResponse(
+            _iter_flows_zip(flows),
+            media_type="application/x-zip-compressed",
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+    
+    return remove_api_keys(flows[0].model_dump())
\ No newline at end of file
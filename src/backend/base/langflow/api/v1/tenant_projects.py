@@ -2,7 +2,8 @@
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from pydantic import TypeAdapter
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from langflow.api.utils import CurrentActiveUser, DbSession
@@ -13,10 +14,25 @@ from langflow.services.database.models.folder.model import (
     FolderRead,
     FolderUpdate,
 )
+from langflow.services.cache.services import TenantCacheService, get_cache_service_factory
 from langflow.services.database.models.folder.crud import FolderCRUD
 
 router = APIRouter(prefix="/tenant/projects", tags=["Tenant Projects"])
 
+# One compiled validator/serializer shared by every folder list response
+_FOLDER_LIST_ADAPTER = TypeAdapter(List[FolderRead])
+
+
+def _folder_list_response(folders) -> Response:
+    """Validate and serialize a list of folders in a single pass, bypassing FastAPI re-serialization."""
+    items = _FOLDER_LIST_ADAPTER.validate_python(folders, from_attributes=True)
+    return Response(content=_FOLDER_LIST_ADAPTER.dump_json(items), media_type="application/json")
+
+
+async def _get_tenant_cache() -> TenantCacheService:
+    """Cache for per-organization views, invalidated on every write in this module."""
+    return (await get_cache_service_factory()).get_tenant_cache()
+
 
 @router.post("/", response_model=FolderRead, status_code=201)
 async def create_project(
@@ -28,23 +44,19 @@ async def create_project(
 ):
     """Create a new project (folder) in the current organization."""
     try:
-        # Check if name already exists in organization
-        if await FolderCRUD.check_folder_name_exists(
-            session=session,
-            name=project.name,
-            organization_id=organization_id
-        ):
-            raise HTTPException(
-                status_code=400,
-                detail="Project name already exists in organization"
-            )
-        
-        folder = await FolderCRUD.create_folder(
+        # The insert is skipped when the name already exists in organization
+        folder = await FolderCRUD.create_folder_if_unique(
             session=session,
             folder_data=project,
             organization_id=organization_id,
             user_id=str(current_user.id)
         )
+        if folder is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Project name already exists in organization"
+            )
+        await (await _get_tenant_cache()).invalidate_org(organization_id)
         return FolderRead.model_validate(folder, from_attributes=True)
     except HTTPException:
         raise
@@ -73,7 +85,7 @@ async def read_projects(
             limit=limit,
             offset=offset
         )
-        return [FolderRead.model_validate(folder, from_attributes=True) for folder in folders]
+        return _folder_list_response(folders)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -98,7 +110,7 @@ async def read_organization_projects(
             offset=offset,
             search_query=search_query
         )
-        return [FolderRead.model_validate(folder, from_attributes=True) for folder in folders]
+        return _folder_list_response(folders)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -113,12 +125,17 @@ async def get_folder_tree(
 ):
     """Get folder tree structure."""
     try:
-        tree = await FolderCRUD.get_folder_tree(
-            session=session,
-            organization_id=organization_id,
-            user_id=str(current_user.id),
-            root_folder_id=root_folder_id
-        )
+        tenant_cache = await _get_tenant_cache()
+        cache_key = ["folder_tree", str(current_user.id), str(root_folder_id)]
+        tree = await tenant_cache.get(organization_id, cache_key)
+        if tree is None:
+            tree = await FolderCRUD.get_folder_tree(
+                session=session,
+                organization_id=organization_id,
+                user_id=str(current_user.id),
+                root_folder_id=root_folder_id
+            )
+            await tenant_cache.set(organization_id, cache_key, tree)
         return tree
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
@@ -132,10 +149,14 @@ async def get_folder_statistics(
 ):
     """Get organization folder statistics."""
     try:
-        stats = await FolderCRUD.get_folder_statistics(
-            session=session,
-            organization_id=organization_id
-        )
+        tenant_cache = await _get_tenant_cache()
+        stats = await tenant_cache.get(organization_id, ["folder_statistics"])
+        if stats is None:
+            stats = await FolderCRUD.get_folder_statistics(
+                session=session,
+                organization_id=organization_id
+            )
+            await tenant_cache.set(organization_id, ["folder_statistics"], stats)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
@@ -160,7 +181,7 @@ async def search_folders(
             user_id=user_id or str(current_user.id),
             limit=limit
         )
-        return [FolderRead.model_validate(folder, from_attributes=True) for folder in folders]
+        return _folder_list_response(folders)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -198,20 +219,7 @@ async def update_project(
 ):
     """Update a project."""
     try:
-        # If name is being changed, check uniqueness
-        if folder_update.name:
-            if await FolderCRUD.check_folder_name_exists(
-                session=session,
-                name=folder_update.name,
-                organization_id=organization_id,
-                parent_id=folder_update.parent_id,
-                exclude_id=project_id
-            ):
-                raise HTTPException(
-                    status_code=400,
-                    detail="Project name already exists in the target location"
-                )
-        
+        # Name uniqueness is checked by the UPDATE itself
         updated_folder = await FolderCRUD.update_folder(
             session=session,
             folder_id=project_id,
@@ -219,7 +227,18 @@ async def update_project(
             organization_id=organization_id
         )
         if not updated_folder:
+            # Only the failure path pays for a second lookup to tell 404 from a name conflict
+            if folder_update.name and folder_update.parent_id != project_id and await FolderCRUD.get_folder_by_id(
+                session=session,
+                folder_id=project_id,
+                organization_id=organization_id
+            ):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Project name already exists in the target location"
+                )
             raise HTTPException(status_code=404, detail="Project not found")
+        await (await _get_tenant_cache()).invalidate_org(organization_id)
         return FolderRead.model_validate(updated_folder, from_attributes=True)
     except HTTPException:
         raise
@@ -251,6 +270,7 @@ async def delete_project(
                     status_code=400,
                     detail="Project contains subfolders or flows. Use force=true to delete anyway."
                 )
+        await (await _get_tenant_cache()).invalidate_org(organization_id)
         return {"message": "Project deleted successfully"}
     except HTTPException:
         raise
@@ -279,6 +299,7 @@ async def move_project(
                 status_code=400,
                 detail="Cannot move folder - would create cycle, target not found, or name conflict"
             )
+        await (await _get_tenant_cache()).invalidate_org(organization_id)
         return FolderRead.model_validate(moved_folder, from_attributes=True)
     except HTTPException:
         raise
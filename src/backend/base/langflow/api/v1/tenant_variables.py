@@ -2,7 +2,8 @@
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from pydantic import TypeAdapter
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from langflow.api.utils import CurrentActiveUser, DbSession
@@ -13,10 +14,25 @@ from langflow.services.database.models.variable.model import (
     VariableRead,
     VariableUpdate,
 )
+from langflow.services.cache.services import TenantCacheService, get_cache_service_factory
 from langflow.services.database.models.variable.crud import VariableCRUD
 
 router = APIRouter(prefix="/tenant/variables", tags=["Tenant Variables"])
 
+# One compiled validator/serializer shared by every variable list response
+_VARIABLE_LIST_ADAPTER = TypeAdapter(List[VariableRead])
+
+
+def _variable_list_response(variables) -> Response:
+    """Validate and serialize a list of variables in a single pass, bypassing FastAPI re-serialization."""
+    items = _VARIABLE_LIST_ADAPTER.validate_python(variables, from_attributes=True)
+    return Response(content=_VARIABLE_LIST_ADAPTER.dump_json(items), media_type="application/json")
+
+
+async def _get_tenant_cache() -> TenantCacheService:
+    """Cache for per-organization views, invalidated on every write in this module."""
+    return (await get_cache_service_factory()).get_tenant_cache()
+
 
 @router.post("/", response_model=VariableRead, status_code=201)
 async def create_variable(
@@ -34,24 +50,19 @@ async def create_variable(
                 detail="Variable name and value cannot be empty"
             )
         
-        # Check if variable name already exists for this user in organization
-        if await VariableCRUD.check_variable_name_exists(
+        # The insert is skipped when the name already exists for this user in organization
+        db_variable = await VariableCRUD.create_variable_if_unique(
             session=session,
-            name=variable.name,
+            variable_data=variable,
             organization_id=organization_id,
             user_id=str(current_user.id)
-        ):
+        )
+        if db_variable is None:
             raise HTTPException(
                 status_code=400,
                 detail="Variable name already exists for this user in the organization"
             )
-        
-        db_variable = await VariableCRUD.create_variable(
-            session=session,
-            variable_data=variable,
-            organization_id=organization_id,
-            user_id=str(current_user.id)
-        )
+        await (await _get_tenant_cache()).invalidate_org(organization_id)
         return VariableRead.model_validate(db_variable, from_attributes=True)
     except HTTPException:
         raise
@@ -77,7 +88,7 @@ async def read_variables(
             limit=limit,
             offset=offset
         )
-        return [VariableRead.model_validate(variable, from_attributes=True) for variable in variables]
+        return _variable_list_response(variables)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -102,7 +113,7 @@ async def read_organization_variables(
             offset=offset,
             search_query=search_query
         )
-        return [VariableRead.model_validate(variable, from_attributes=True) for variable in variables]
+        return _variable_list_response(variables)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -126,7 +137,7 @@ async def get_variables_by_type(
             user_id=user_id or str(current_user.id),
             limit=limit
         )
-        return [VariableRead.model_validate(variable, from_attributes=True) for variable in variables]
+        return _variable_list_response(variables)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -139,10 +150,14 @@ async def get_variable_statistics(
 ):
     """Get organization variable statistics."""
     try:
-        stats = await VariableCRUD.get_variable_statistics(
-            session=session,
-            organization_id=organization_id
-        )
+        tenant_cache = await _get_tenant_cache()
+        stats = await tenant_cache.get(organization_id, ["variable_statistics"])
+        if stats is None:
+            stats = await VariableCRUD.get_variable_statistics(
+                session=session,
+                organization_id=organization_id
+            )
+            await tenant_cache.set(organization_id, ["variable_statistics"], stats)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
@@ -169,7 +184,7 @@ async def search_variables(
             user_id=user_id or str(current_user.id),
             limit=limit
         )
-        return [VariableRead.model_validate(variable, from_attributes=True) for variable in variables]
+        return _variable_list_response(variables)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -234,20 +249,7 @@ async def update_variable(
 ):
     """Update a variable."""
     try:
-        # If name is being changed, check uniqueness
-        if variable_update.name:
-            if await VariableCRUD.check_variable_name_exists(
-                session=session,
-                name=variable_update.name,
-                organization_id=organization_id,
-                user_id=str(current_user.id),
-                exclude_id=variable_id
-            ):
-                raise HTTPException(
-                    status_code=400,
-                    detail="Variable name already exists for this user in the organization"
-                )
-        
+        # Name uniqueness is checked by the UPDATE itself
         updated_variable = await VariableCRUD.update_variable(
             session=session,
             variable_id=variable_id,
@@ -255,7 +257,18 @@ async def update_variable(
             organization_id=organization_id
         )
         if not updated_variable:
+            # Only the failure path pays for a second lookup to tell 404 from a name conflict
+            if variable_update.name and await VariableCRUD.get_variable_by_id(
+                session=session,
+                variable_id=variable_id,
+                organization_id=organization_id
+            ):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Variable name already exists for this user in the organization"
+                )
             raise HTTPException(status_code=404, detail="Variable not found")
+        await (await _get_tenant_cache()).invalidate_org(organization_id)
         return VariableRead.model_validate(updated_variable, from_attributes=True)
     except HTTPException:
         raise
@@ -279,6 +292,7 @@ async def delete_variable(
         )
         if not success:
             raise HTTPException(status_code=404, detail="Variable not found")
+        await (await _get_tenant_cache()).invalidate_org(organization_id)
         return {"message": "Variable deleted successfully"}
     except HTTPException:
         raise
@@ -309,6 +323,7 @@ async def duplicate_variable(
                 status_code=400,
                 detail="Variable not found or name already exists"
             )
+        await (await _get_tenant_cache()).invalidate_org(organization_id)
         return VariableRead.model_validate(duplicated_variable, from_attributes=True)
     except HTTPException:
         raise
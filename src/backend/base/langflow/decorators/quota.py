@@ -1,16 +1,85 @@
 """Quota checking decorators for API endpoints"""
 import functools
+import inspect
 import logging
-from typing import Callable, Optional
+from typing import Annotated, Any, Callable, NamedTuple, Optional, get_args, get_origin
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 from sqlmodel.ext.asyncio import AsyncSession
 
-from langflow.services.billing.usage_service import UsageService
+from langflow.services.billing.usage_service import UsageService, get_usage_service
+from langflow.services.database.models.subscription.crud import SubscriptionCRUD
 from langflow.services.database.models.subscription.model import MetricType
 
 logger = logging.getLogger(__name__)
 
+# 订阅等级从低到高
+PLAN_HIERARCHY = {
+    'free': 0,
+    'basic': 1,
+    'professional': 2,
+    'enterprise': 3
+}
+
+
+class _ContextParams(NamedTuple):
+    """被装饰函数中承载session、org_id和request的参数名"""
+    
+    session: Optional[str]
+    org_id: Optional[str]
+    request: Optional[str]
+
+
+def _is_async_session_annotation(annotation: Any) -> bool:
+    """判断参数注解是否为AsyncSession（支持 Annotated[AsyncSession, ...]）"""
+    if get_origin(annotation) is Annotated:
+        annotation = get_args(annotation)[0]
+    return isinstance(annotation, type) and issubclass(annotation, AsyncSession)
+
+
+def _bind_context_params(func: Callable) -> _ContextParams:
+    """在装饰时检查一次函数签名，记录session、org_id和request对应的参数名"""
+    session_param = org_param = request_param = None
+    
+    for name, param in inspect.signature(func).parameters.items():
+        if session_param is None and (name == 'session' or _is_async_session_annotation(param.annotation)):
+            session_param = name
+        elif org_param is None and name in ('org_id', 'organization_id'):
+            org_param = name
+        elif request_param is None and (name == 'request' or param.annotation is Request):
+            request_param = name
+    
+    return _ContextParams(session_param, org_param, request_param)
+
+
+def _get_tenant_ctx(kwargs: dict[str, Any], params: _ContextParams):
+    """读取中间件写入 request.state 的租户上下文，没有时返回None"""
+    request = kwargs.get(params.request) if params.request else None
+    if isinstance(request, Request):
+        return getattr(request.state, 'tenant_ctx', None)
+    return None
+
+
+def _resolve_session_and_org(
+    kwargs: dict[str, Any],
+    params: _ContextParams
+) -> tuple[Optional[AsyncSession], Optional[str]]:
+    """按装饰时绑定的参数名直接取session和org_id，组织ID优先取自请求级租户上下文"""
+    session = kwargs.get(params.session) if params.session else None
+    
+    tenant_ctx = _get_tenant_ctx(kwargs, params)
+    if tenant_ctx is not None:
+        org_id = tenant_ctx.organization_id
+    else:
+        org_id = kwargs.get(params.org_id) if params.org_id else None
+    
+    if not isinstance(session, AsyncSession):
+        session = None
+    if not isinstance(org_id, str):
+        org_id = None
+    
+    return session, org_id
+
 
 def check_quota(
     metric_type: MetricType,
@@ -28,18 +97,12 @@ def check_quota(
         usage_service: 使用量服务实例
     """
     def decorator(func: Callable) -> Callable:
+        params = _bind_context_params(func)
+        
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             # 获取参数中的session和org_id
-            session = None
-            org_id = None
-            
-            # 从kwargs中查找
-            for key, value in kwargs.items():
-                if isinstance(value, AsyncSession):
-                    session = value
-                elif key in ['org_id', 'organization_id'] and isinstance(value, str):
-                    org_id = value
+            session, org_id = _resolve_session_and_org(kwargs, params)
             
             # 如果找不到org_id，尝试从其他参数推断
             if not org_id and 'current_user' in kwargs:
@@ -51,37 +114,36 @@ def check_quota(
                 logger.warning("Cannot perform quota check: missing session or org_id")
                 return await func(*args, **kwargs)
             
-            # 执行配额检查
-            service = usage_service or UsageService()
+            # 执行配额检查并预占使用量
+            service = usage_service or get_usage_service()
             try:
-                can_use, quota_info = await service.check_quota(
+                can_use, quota_info = await service.check_and_track(
                     session, org_id, metric_type, amount
                 )
-                
-                if not can_use:
-                    message = error_message or f"Usage quota exceeded for {metric_type.value}"
-                    raise HTTPException(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail={
-                            "message": message,
-                            "quota_info": quota_info
-                        }
-                    )
-                
-                # 配额检查通过，执行原函数
-                result = await func(*args, **kwargs)
-                
-                # 成功执行后记录使用量
-                await service._track_usage(session, org_id, metric_type, amount)
-                
-                return result
-                
-            except HTTPException:
-                raise
             except Exception as e:
                 logger.error(f"Quota check failed: {e}")
                 # 如果配额检查失败，仍然允许执行（避免阻塞正常业务）
                 return await func(*args, **kwargs)
+            
+            if not can_use:
+                message = error_message or f"Usage quota exceeded for {metric_type.value}"
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail={
+                        "message": message,
+                        "quota_info": quota_info
+                    }
+                )
+            
+            # 配额检查通过，执行原函数；失败时撤销预占的使用量
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                try:
+                    await service.release_usage(session, org_id, metric_type, amount)
+                except Exception as e:
+                    logger.error(f"Usage release failed: {e}")
+                raise
         
         return wrapper
     return decorator
@@ -101,22 +163,17 @@ def track_usage(
         usage_service: 使用量服务实例
     """
     def decorator(func: Callable) -> Callable:
+        params = _bind_context_params(func)
+        
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             result = await func(*args, **kwargs)
             
             # 成功执行后追踪使用量
-            session = None
-            org_id = None
-            
-            for key, value in kwargs.items():
-                if isinstance(value, AsyncSession):
-                    session = value
-                elif key in ['org_id', 'organization_id'] and isinstance(value, str):
-                    org_id = value
+            session, org_id = _resolve_session_and_org(kwargs, params)
             
             if session and org_id:
-                service = usage_service or UsageService()
+                service = usage_service or get_usage_service()
                 try:
                     await service._track_usage(session, org_id, metric_type, amount)
                 except Exception as e:
@@ -139,28 +196,27 @@ def require_subscription(
         min_plan_type: 最低订阅类型要求
         error_message: 自定义错误消息
     """
+    required_level = PLAN_HIERARCHY.get(min_plan_type, 1)
+    
     def decorator(func: Callable) -> Callable:
+        params = _bind_context_params(func)
+        
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             # 获取session和org_id
-            session = None
-            org_id = None
-            
-            for key, value in kwargs.items():
-                if isinstance(value, AsyncSession):
-                    session = value
-                elif key in ['org_id', 'organization_id'] and isinstance(value, str):
-                    org_id = value
+            session, org_id = _resolve_session_and_org(kwargs, params)
+            tenant_ctx = _get_tenant_ctx(kwargs, params)
             
             if session and org_id:
-                from langflow.services.database.models.subscription.crud import SubscriptionCRUD
-                
                 try:
-                    subscription = await SubscriptionCRUD.get_organization_subscription(
-                        session, org_id
-                    )
+                    # 同一请求内订阅等级只解析一次，跨请求由SubscriptionCRUD短期缓存
+                    plan_tier = tenant_ctx.plan_tier if tenant_ctx else None
+                    if plan_tier is None:
+                        plan_tier = await SubscriptionCRUD.get_organization_plan_tier(session, org_id)
+                        if tenant_ctx is not None and plan_tier is not None:
+                            tenant_ctx.plan_tier = plan_tier
                     
-                    if not subscription:
+                    if plan_tier is None:
                         message = error_message or f"This feature requires a {min_plan_type} subscription"
                         raise HTTPException(
                             status_code=status.HTTP_403_FORBIDDEN,
@@ -172,24 +228,14 @@ def require_subscription(
                         )
                     
                     # 检查订阅等级
-                    plan_hierarchy = {
-                        'free': 0,
-                        'basic': 1,
-                        'professional': 2,
-                        'enterprise': 3
-                    }
-                    
-                    current_level = plan_hierarchy.get(subscription.plan.plan_type.value, 0)
-                    required_level = plan_hierarchy.get(min_plan_type, 1)
-                    
-                    if current_level < required_level:
+                    if PLAN_HIERARCHY.get(plan_tier, 0) < required_level:
                         message = error_message or f"This feature requires a {min_plan_type} subscription"
                         raise HTTPException(
                             status_code=status.HTTP_403_FORBIDDEN,
                             detail={
                                 "message": message,
                                 "required_plan": min_plan_type,
-                                "current_plan": subscription.plan.plan_type.value
+                                "current_plan": plan_tier
                             }
                         )
                     
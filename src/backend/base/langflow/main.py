@@ -236,6 +236,13 @@ def get_lifespan(*, fix_migration=False, version=None):
 
                 # Step 2: Cleaning Up Services
                 with shutdown_progress.step(2):
+                    from langflow.services.billing.usage_service import get_usage_service
+
+                    # Write usage still buffered in this process while the database is up
+                    try:
+                        await asyncio.wait_for(get_usage_service().shutdown(), timeout=10)
+                    except Exception as e:  # noqa: BLE001
+                        logger.warning(f"Failed to flush buffered usage on shutdown: {e}")
                     try:
                         await asyncio.wait_for(teardown_services(), timeout=10)
                     except asyncio.TimeoutError:
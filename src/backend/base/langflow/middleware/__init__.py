@@ -1,11 +1,12 @@
 """Middleware initialization for security and performance features"""
 from loguru import logger
+from starlette.middleware.gzip import GZipMiddleware
 
 from langflow.middleware.rate_limiting import add_rate_limiting_middleware
 from langflow.middleware.input_validation import add_input_validation_middleware
 from langflow.middleware.security_headers import add_security_headers_middleware
 from langflow.middleware.api_key_auth import add_api_key_auth_middleware
-from langflow.middleware.compression import get_compression_middleware, CompressionConfig
+from langflow.middleware.compression import CompressionConfig
 from langflow.middleware.error_handling import add_error_handling_middleware
 
 
@@ -38,12 +39,14 @@ async def add_performance_middleware(app):
     
     logger.info("Adding performance middleware...")
     
-    # Add compression middleware
+    # Add gzip compression for every response above the size threshold;
+    # responses that already carry a Content-Encoding are passed through
     compression_config = CompressionConfig()
-    compression_middleware = get_compression_middleware(compression_config)
-    
-    # Add middleware to application
-    app.add_middleware(type(compression_middleware))
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=compression_config.min_size_to_compress,
+        compresslevel=compression_config.compression_level,
+    )
     logger.info("✓ Compression middleware added")
     
     logger.info("All performance middleware added successfully")
@@ -1,5 +1,6 @@
 """Multi-tenant context middleware for Row Level Security"""
 import logging
+from dataclasses import dataclass
 from typing import Callable, Optional
 
 from fastapi import Request, Response, HTTPException, status
@@ -12,6 +13,20 @@ from langflow.services.deps import get_session
 
 logger = logging.getLogger(__name__)
 
+# 租户上下文直接通过set_config/current_setting读写（事务级），不经过plpgsql包装函数
+SET_TENANT_QUERY = text("SELECT set_config('app.current_organization_id', :org_id, true)")
+GET_TENANT_QUERY = text("SELECT current_setting('app.current_organization_id', true)")
+
+
+@dataclass(slots=True)
+class TenantCtx:
+    """请求级租户上下文，由中间件解析一次后挂在 request.state.tenant_ctx 上"""
+    
+    user_id: Optional[str]
+    organization_id: str
+    # 订阅等级按需解析，首次查询后缓存在本次请求中
+    plan_tier: Optional[str] = None
+
 
 class TenantContextMiddleware(BaseHTTPMiddleware):
     """
@@ -54,8 +69,13 @@ class TenantContextMiddleware(BaseHTTPMiddleware):
                     # 设置数据库会话中的租户上下文
                     await self._set_tenant_context(request, org_id)
                     
-                    # 将组织ID添加到请求状态，供后续使用
+                    # 将组织ID和租户上下文添加到请求状态，供依赖和装饰器直接读取
                     request.state.current_organization_id = org_id
+                    user_id = getattr(request.state, 'user_id', None)
+                    request.state.tenant_ctx = TenantCtx(
+                        user_id=str(user_id) if user_id else None,
+                        organization_id=org_id
+                    )
                 else:
                     return Response(
                         content='{"error": "Access denied to organization"}',
@@ -146,13 +166,14 @@ class TenantContextMiddleware(BaseHTTPMiddleware):
                 # 禁用RLS进行权限检查
                 await session.exec(text("SET row_security = off"))
                 
-                user_orgs = await OrganizationCRUD.get_user_organizations(session, user_id)
+                # 只查询组织ID，结果按用户短期缓存
+                user_org_ids = await OrganizationCRUD.get_user_org_ids(session, str(user_id))
                 
                 # 重新启用RLS
                 await session.exec(text("SET row_security = on"))
                 
                 # 检查用户是否属于该组织
-                return any(org.id == org_id for org in user_orgs)
+                return str(org_id) in user_org_ids
                 
         except Exception as e:
             logger.error(f"Failed to validate organization access: {e}")
@@ -166,7 +187,7 @@ class TenantContextMiddleware(BaseHTTPMiddleware):
             
             if session and isinstance(session, AsyncSession):
                 # 设置PostgreSQL会话变量，RLS策略会使用这个变量
-                await session.exec(text(f"SELECT set_current_tenant('{org_id}')"))
+                await session.exec(SET_TENANT_QUERY.bindparams(org_id=org_id))
                 logger.debug(f"Set tenant context to organization: {org_id}")
             else:
                 logger.warning("No database session found in request state")
@@ -189,7 +210,7 @@ class TenantContextManager:
     async def set_organization_context(session: AsyncSession, org_id: str):
         """手动设置组织上下文（用于后台任务等场景）"""
         try:
-            await session.exec(text(f"SELECT set_current_tenant('{org_id}')"))
+            await session.exec(SET_TENANT_QUERY.bindparams(org_id=org_id))
             logger.debug(f"Manually set tenant context to: {org_id}")
         except Exception as e:
             logger.error(f"Failed to manually set tenant context: {e}")
@@ -199,7 +220,7 @@ class TenantContextManager:
     async def clear_organization_context(session: AsyncSession):
         """清除组织上下文"""
         try:
-            await session.exec(text("SELECT set_current_tenant('')"))
+            await session.exec(SET_TENANT_QUERY.bindparams(org_id=""))
             logger.debug("Cleared tenant context")
         except Exception as e:
             logger.error(f"Failed to clear tenant context: {e}")
@@ -208,7 +229,7 @@ class TenantContextManager:
     async def get_current_organization(session: AsyncSession) -> Optional[str]:
         """获取当前组织上下文"""
         try:
-            result = await session.exec(text("SELECT get_current_tenant()"))
+            result = await session.exec(GET_TENANT_QUERY)
             org_id = result.scalar()
             return org_id if org_id else None
         except Exception as e:
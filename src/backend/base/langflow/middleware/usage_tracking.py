@@ -7,7 +7,7 @@ from fastapi import Request, Response, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from sqlmodel.ext.asyncio import AsyncSession
 
-from langflow.services.billing.usage_service import UsageService
+from langflow.services.billing.usage_service import UsageService, get_usage_service
 from langflow.services.database.models.subscription.crud import OrganizationCRUD
 from langflow.services.database.models.subscription.model import MetricType
 
@@ -173,7 +173,7 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
 async def add_usage_tracking_middleware(app, usage_service: UsageService = None):
     """添加使用量追踪中间件到应用"""
     if usage_service is None:
-        usage_service = UsageService()
+        usage_service = get_usage_service()
     
     app.add_middleware(UsageTrackingMiddleware, usage_service=usage_service)
     logger.info("Usage tracking middleware added")
\ No newline at end of file
@@ -68,6 +68,9 @@ class StripeService:
             if not org or not plan:
                 raise ValueError("Organization or plan not found")
             
+            # 结束只读事务，调用Stripe API期间将数据库连接归还连接池
+            await session.commit()
+            
             # 创建或获取Stripe客户
             if not customer_id:
                 customer = await self.create_customer(org)
@@ -143,6 +146,9 @@ class StripeService:
             if not subscription or not subscription.stripe_subscription_id:
                 raise ValueError("Subscription not found")
             
+            # 结束只读事务，调用Stripe API期间将数据库连接归还连接池
+            await session.commit()
+            
             # 在Stripe中取消订阅
             if cancel_immediately:
                 stripe.Subscription.delete(subscription.stripe_subscription_id)
@@ -187,6 +193,9 @@ class StripeService:
             if not subscription or not new_plan:
                 raise ValueError("Subscription or plan not found")
             
+            # 结束只读事务，调用Stripe API期间将数据库连接归还连接池
+            await session.commit()
+            
             # 获取Stripe订阅
             stripe_subscription = stripe.Subscription.retrieve(
                 subscription.stripe_subscription_id
@@ -270,19 +279,19 @@ class StripeService:
             logger.error(f"Failed to create billing portal session: {e}")
             raise
     
-    async def handle_webhook(
-        self,
-        payload: bytes,
-        sig_header: str,
-        session: AsyncSession
-    ) -> Dict:
-        """处理Stripe webhook事件"""
+    def construct_event(self, payload: bytes, sig_header: str) -> stripe.Event:
+        """验证webhook签名并解析事件（纯CPU操作，不访问数据库）"""
         try:
-            # 验证webhook签名
-            event = stripe.Webhook.construct_event(
+            return stripe.Webhook.construct_event(
                 payload, sig_header, self.webhook_secret
             )
-            
+        except stripe.error.SignatureVerificationError as e:
+            logger.error(f"Webhook signature verification failed: {e}")
+            raise
+    
+    async def process_event(self, event: stripe.Event, session: AsyncSession) -> Dict:
+        """处理已验证的Stripe webhook事件"""
+        try:
             # 根据事件类型处理
             event_type = event['type']
             event_data = event['data']['object']
@@ -304,13 +313,20 @@ class StripeService:
             
             return {'status': 'success', 'event_type': event_type}
             
-        except stripe.error.SignatureVerificationError as e:
-            logger.error(f"Webhook signature verification failed: {e}")
-            raise
         except Exception as e:
             logger.error(f"Webhook processing failed: {e}")
             raise
     
+    async def handle_webhook(
+        self,
+        payload: bytes,
+        sig_header: str,
+        session: AsyncSession
+    ) -> Dict:
+        """处理Stripe webhook事件"""
+        event = self.construct_event(payload, sig_header)
+        return await self.process_event(event, session)
+    
     async def _handle_subscription_created(self, session: AsyncSession, data: Dict):
         """处理订阅创建事件"""
         subscription_id = data.get('metadata', {}).get('subscription_id')
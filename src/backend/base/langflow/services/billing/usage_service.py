@@ -1,10 +1,18 @@
 """Usage tracking and quota management service"""
+import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Dict, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
 
+import orjson
+from redis.exceptions import RedisError, ResponseError
 from sqlmodel.ext.asyncio import AsyncSession
 
+from langflow.services.cache.redis_cache import get_cache_manager
+from langflow.services.deps import session_scope
 from langflow.services.database.models.subscription.crud import (
     UsageMetricCRUD, SubscriptionCRUD, OrganizationCRUD
 )
@@ -14,12 +22,73 @@ from langflow.services.database.models.subscription.model import (
 
 logger = logging.getLogger(__name__)
 
+# Redis中按组织聚合的使用量计数（Hash: metric_type -> value）
+USAGE_BUFFER_PREFIX = "usage"
+# 使用量明细事件流（按组织，限制长度）
+USAGE_EVENTS_PREFIX = "usage_events"
+USAGE_EVENTS_MAXLEN = 10000
+# 缓冲计数写入数据库的间隔（秒）
+USAGE_FLUSH_INTERVAL = 30
+# 写入某个组织的缓冲计数前须持有的租约（秒），同一时刻只有一个写入者
+USAGE_FLUSH_LEASE_TTL = 300
 
-class UsageService:
-    """使用量追踪和配额管理服务"""
+# 仅当租约仍属于自己时才释放
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+# Redis不可用时，进程内缓冲写入数据库的间隔（秒）和提前写入的事件数阈值
+USAGE_LOCAL_FLUSH_INTERVAL = 0.25
+USAGE_LOCAL_FLUSH_EVENTS = 1000
+
+
+class _UsageBuffer:
+    """进程内使用量合并缓冲：(organization_id, metric_type) -> 增量
+    
+    add/drain 中没有 await，在事件循环内天然原子，无需加锁。
+    """
     
     def __init__(self):
-        pass
+        self._deltas: defaultdict[tuple[str, MetricType], int] = defaultdict(int)
+        self.events = 0
+    
+    def add(self, organization_id: str, metric_type: MetricType, value: int) -> None:
+        self._deltas[(str(organization_id), metric_type)] += value
+        self.events += 1
+    
+    def drain(self) -> Dict[str, Dict[MetricType, int]]:
+        """取出并清空缓冲，按组织分组"""
+        totals: Dict[str, Dict[MetricType, int]] = defaultdict(dict)
+        for (organization_id, metric_type), value in self._deltas.items():
+            if value:
+                totals[organization_id][metric_type] = value
+        self._deltas.clear()
+        self.events = 0
+        return totals
+    
+    def restore(self, totals: Dict[str, Dict[MetricType, int]]) -> None:
+        """写入失败时把取出的增量放回缓冲"""
+        for organization_id, metrics in totals.items():
+            for metric_type, value in metrics.items():
+                self._deltas[(organization_id, metric_type)] += value
+                self.events += 1
+
+
+class UsageService:
+    """使用量追踪和配额管理服务
+    
+    Redis可用时使用量先以HINCRBY聚合在Redis中，由后台任务定期批量写入数据库；
+    Redis不可用时在进程内合并，每 USAGE_LOCAL_FLUSH_INTERVAL 秒批量写入一次。
+    """
+    
+    def __init__(self, flush_interval: int = USAGE_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._flush_task: Optional[asyncio.Task] = None
+        self._local_buffer = _UsageBuffer()
+        self._local_flush_task: Optional[asyncio.Task] = None
+        self._local_flush_requested = asyncio.Event()
     
     async def track_api_call(
         self,
@@ -128,16 +197,13 @@ class UsageService:
                 session, organization_id, metric_type, requested_amount
             )
             
-            quota_info = {
-                'metric_type': metric_type.value,
-                'current_usage': current_usage,
-                'limit': limit,
-                'requested_amount': requested_amount,
-                'remaining': limit - current_usage if limit > 0 else -1,
-                'unlimited': limit == -1
-            }
+            # 加上尚未写入数据库的缓冲使用量
+            pending = await self._get_pending_usage(organization_id, metric_type)
+            if pending:
+                current_usage += pending
+                can_use = limit == -1 or (current_usage + requested_amount) <= limit
             
-            return can_use, quota_info
+            return can_use, self._quota_info(metric_type, current_usage, limit, requested_amount)
             
         except Exception as e:
             logger.error(f"Failed to check quota for {organization_id}: {e}")
@@ -147,6 +213,97 @@ class UsageService:
                 'default_allowed': True
             }
     
+    async def check_and_track(
+        self,
+        session: AsyncSession,
+        organization_id: str,
+        metric_type: MetricType,
+        amount: int = 1,
+        metadata: Optional[Dict] = None
+    ) -> Tuple[bool, Dict]:
+        """检查配额并预占使用量，一次调用完成
+        
+        Redis可用时先用HINCRBY原子地预占使用量，再与限额比较，超限则撤销预占；
+        并发请求看得到彼此的预占，不会同时通过检查后超量。
+        Redis不可用时检查配额后直接写入数据库。
+        
+        Returns:
+            Tuple[bool, Dict]: (是否允许, 配额信息)
+        """
+        can_use, current_usage, limit = await UsageMetricCRUD.check_usage_limit(
+            session, organization_id, metric_type, amount
+        )
+        
+        redis_client = await self._get_redis_client()
+        if redis_client is not None:
+            key = f"{USAGE_BUFFER_PREFIX}:{organization_id}"
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.hincrby(key, metric_type.value, amount)
+                    pipe.hget(f"{key}:flushing", metric_type.value)
+                    pending, flushing = await pipe.execute()
+                
+                # pending 已包含本次预占
+                current_usage += int(pending) - amount + int(flushing or 0)
+                can_use = limit == -1 or (current_usage + amount) <= limit
+                
+                if can_use:
+                    await redis_client.xadd(
+                        f"{USAGE_EVENTS_PREFIX}:{organization_id}",
+                        {
+                            'metric_type': metric_type.value,
+                            'value': amount,
+                            'metadata': orjson.dumps(metadata or {}, default=str)
+                        },
+                        maxlen=USAGE_EVENTS_MAXLEN,
+                        approximate=True
+                    )
+                    self._ensure_flush_task()
+                else:
+                    await redis_client.hincrby(key, metric_type.value, -amount)
+                
+                return can_use, self._quota_info(metric_type, current_usage, limit, amount)
+            except RedisError as e:
+                logger.warning(f"Failed to reserve usage in Redis, writing to database: {e}")
+        
+        if can_use:
+            await UsageMetricCRUD.record_usage(
+                session, organization_id, metric_type, amount, metadata
+            )
+        return can_use, self._quota_info(metric_type, current_usage, limit, amount)
+    
+    async def release_usage(
+        self,
+        session: AsyncSession,
+        organization_id: str,
+        metric_type: MetricType,
+        amount: int = 1
+    ) -> None:
+        """撤销 check_and_track 预占的使用量（请求处理失败时调用）"""
+        redis_client = await self._get_redis_client()
+        if redis_client is not None:
+            try:
+                await self._buffer_usage(
+                    redis_client, organization_id, metric_type, -amount, {'released': True}
+                )
+                return
+            except RedisError as e:
+                logger.warning(f"Failed to release usage in Redis, buffering locally: {e}")
+        
+        self._buffer_usage_locally(organization_id, metric_type, -amount)
+    
+    @staticmethod
+    def _quota_info(metric_type: MetricType, current_usage: int, limit: int, requested_amount: int) -> Dict:
+        """构造配额信息"""
+        return {
+            'metric_type': metric_type.value,
+            'current_usage': current_usage,
+            'limit': limit,
+            'requested_amount': requested_amount,
+            'remaining': limit - current_usage if limit > 0 else -1,
+            'unlimited': limit == -1
+        }
+    
     async def get_usage_summary(
         self,
         session: AsyncSession,
@@ -273,28 +430,182 @@ class UsageService:
         metadata: Optional[Dict] = None
     ) -> bool:
         """内部使用量追踪方法"""
+        redis_client = await self._get_redis_client()
+        if redis_client is not None:
+            try:
+                await self._buffer_usage(redis_client, organization_id, metric_type, value, metadata)
+                return True
+            except RedisError as e:
+                logger.warning(f"Failed to buffer usage in Redis, buffering locally: {e}")
+        
+        # Redis不可用：在进程内合并，由后台任务批量写入
+        self._buffer_usage_locally(organization_id, metric_type, value)
+        return True
+    
+    def _buffer_usage_locally(self, organization_id: str, metric_type: MetricType, value: int) -> None:
+        """在进程内缓冲中累加使用量，事件数达到阈值时提前触发写入"""
+        self._local_buffer.add(organization_id, metric_type, value)
+        if self._local_buffer.events >= USAGE_LOCAL_FLUSH_EVENTS:
+            self._local_flush_requested.set()
+        if self._local_flush_task is None or self._local_flush_task.done():
+            self._local_flush_task = asyncio.create_task(self._local_flush_loop())
+    
+    async def flush_local_buffer(self, session: AsyncSession) -> int:
+        """将进程内缓冲的使用量按组织批量写入数据库，返回写入的组织数"""
+        totals = self._local_buffer.drain()
+        flushed = 0
         try:
-            # 首先检查是否超出配额
-            can_use, quota_info = await self.check_quota(
-                session, organization_id, metric_type, value
-            )
-            
-            # 如果超出配额且不是无限制计划，记录但不阻止（记录超量使用）
-            if not can_use and quota_info.get('limit', 0) != -1:
-                logger.warning(f"Usage limit exceeded for {organization_id}: {quota_info}")
-                # 可以选择是否阻止超量使用
-                # return False
-            
-            # 记录使用量
-            await UsageMetricCRUD.record_usage(
-                session, organization_id, metric_type, value, metadata
+            for organization_id, metrics in list(totals.items()):
+                await UsageMetricCRUD.record_usage_batch(session, organization_id, metrics)
+                del totals[organization_id]
+                flushed += 1
+        finally:
+            # 未写入的部分放回缓冲，下次重试
+            self._local_buffer.restore(totals)
+        return flushed
+    
+    async def _local_flush_loop(self) -> None:
+        """后台任务：定期或在缓冲事件数达到阈值时写入进程内缓冲"""
+        while True:
+            try:
+                await asyncio.wait_for(self._local_flush_requested.wait(), USAGE_LOCAL_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._local_flush_requested.clear()
+            if not self._local_buffer.events:
+                continue
+            try:
+                async with session_scope() as session:
+                    await self.flush_local_buffer(session)
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Failed to flush local usage buffer: {e}")
+    
+    async def shutdown(self) -> None:
+        """停止后台写入任务，并将进程内缓冲中剩余的使用量最后写入一次
+        
+        应用关闭时调用；Redis中的缓冲计数保留在Redis中，由其他实例或下次启动写入。
+        """
+        tasks = [task for task in (self._flush_task, self._local_flush_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        # 被取消的写入会把未提交的增量放回缓冲
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._flush_task = None
+        self._local_flush_task = None
+        
+        if self._local_buffer.events:
+            async with session_scope() as session:
+                await self.flush_local_buffer(session)
+    
+    async def _get_redis_client(self):
+        """获取已连接的Redis客户端，不可用时返回None"""
+        cache_manager = await get_cache_manager()
+        if cache_manager.is_connected and cache_manager.redis_client is not None:
+            return cache_manager.redis_client
+        return None
+    
+    async def _buffer_usage(
+        self,
+        redis_client,
+        organization_id: str,
+        metric_type: MetricType,
+        value: int,
+        metadata: Optional[Dict] = None
+    ) -> None:
+        """在Redis中累加使用量并追加明细事件"""
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hincrby(f"{USAGE_BUFFER_PREFIX}:{organization_id}", metric_type.value, value)
+            pipe.xadd(
+                f"{USAGE_EVENTS_PREFIX}:{organization_id}",
+                {
+                    'metric_type': metric_type.value,
+                    'value': value,
+                    'metadata': orjson.dumps(metadata or {}, default=str)
+                },
+                maxlen=USAGE_EVENTS_MAXLEN,
+                approximate=True
             )
+            await pipe.execute()
+        self._ensure_flush_task()
+    
+    async def _get_pending_usage(self, organization_id: str, metric_type: MetricType) -> int:
+        """获取Redis中尚未写入数据库的使用量"""
+        redis_client = await self._get_redis_client()
+        if redis_client is None:
+            return 0
+        key = f"{USAGE_BUFFER_PREFIX}:{organization_id}"
+        try:
+            pending = await redis_client.hget(key, metric_type.value)
+            flushing = await redis_client.hget(f"{key}:flushing", metric_type.value)
+        except RedisError as e:
+            logger.warning(f"Failed to read buffered usage: {e}")
+            return 0
+        return int(pending or 0) + int(flushing or 0)
+    
+    async def flush_usage_buffer(self, session: AsyncSession) -> int:
+        """将Redis中的缓冲使用量批量写入数据库，返回写入的组织数
+        
+        每个组织先用 SET NX 取得租约，持有租约的写入者才会读取并写入
+        usage:<org>:flushing，多个进程/实例并发写入时同一份计数只会记录一次。
+        """
+        redis_client = await self._get_redis_client()
+        if redis_client is None:
+            return 0
+        
+        organization_ids = set()
+        async for key in redis_client.scan_iter(match=f"{USAGE_BUFFER_PREFIX}:*"):
+            key = key.decode() if isinstance(key, bytes) else key
+            organization_ids.add(key.split(":")[1])
+        
+        token = uuid4().hex
+        flushed = 0
+        for organization_id in organization_ids:
+            key = f"{USAGE_BUFFER_PREFIX}:{organization_id}"
+            lease_key = f"{key}:lease"
+            if not await redis_client.set(lease_key, token, nx=True, ex=USAGE_FLUSH_LEASE_TTL):
+                # 其他写入者正在处理该组织
+                continue
             
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to track usage: {e}")
-            return False
+            try:
+                pending_key = f"{key}:flushing"
+                # 持有租约时遗留的 :flushing 只可能来自上次失败的写入，直接重试；
+                # 否则原子改名，之后的累加写入新的Hash，不会丢失
+                if not await redis_client.exists(pending_key):
+                    try:
+                        if not await redis_client.renamenx(key, pending_key):
+                            continue
+                    except ResponseError:
+                        # 没有新的缓冲计数
+                        continue
+                
+                counters = await redis_client.hgetall(pending_key)
+                totals = {
+                    MetricType(metric.decode() if isinstance(metric, bytes) else metric): int(value)
+                    for metric, value in counters.items()
+                    if int(value)
+                }
+                await UsageMetricCRUD.record_usage_batch(session, organization_id, totals)
+                await redis_client.delete(pending_key)
+                flushed += 1
+            finally:
+                await redis_client.eval(_RELEASE_LEASE_SCRIPT, 1, lease_key, token)
+        
+        return flushed
+    
+    def _ensure_flush_task(self) -> None:
+        """确保后台定期写入任务正在运行"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self) -> None:
+        """后台任务：定期将缓冲使用量写入数据库"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                async with session_scope() as session:
+                    await self.flush_usage_buffer(session)
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Failed to flush buffered usage: {e}")
     
     async def get_quota_alerts(
         self,
@@ -323,4 +634,10 @@ class UsageService:
             
         except Exception as e:
             logger.error(f"Failed to get quota alerts: {e}")
-            return []
\ No newline at end of file
+            return []
+
+
+@lru_cache(maxsize=1)
+def get_usage_service() -> UsageService:
+    """进程内共享的使用量服务实例，所有调用方共用同一组缓冲和后台写入任务"""
+    return UsageService()
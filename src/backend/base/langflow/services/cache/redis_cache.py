@@ -27,6 +27,8 @@ class CacheKeyPrefix(str, Enum):
     TEMPLATE = "template"
     SETTINGS = "settings"
     METADATA = "metadata"
+    BILLING = "billing"
+    TENANT = "tenant"
 
 
 class CacheStrategy(str, Enum):
@@ -2,6 +2,8 @@
 from typing import Any, Dict, List, Optional, Union
 from datetime import datetime, timedelta
 import json
+from uuid import uuid4
+
 from loguru import logger
 
 from .redis_cache import RedisCacheManager, CacheKeyPrefix, cache_result
@@ -228,6 +230,76 @@ class SettingsCacheService:
         return await self.cache_manager.set(CacheKeyPrefix.SETTINGS, ["feature_flags"], flags, ttl)
 
 
+class BillingCacheService:
+    """Cache service for billing data"""
+    
+    PLANS_KEY = "subscription_plans:v1"
+    PLAN_TIER_KEY = "plan_tier"
+    # Cached for organizations without an active subscription, distinct from a cache miss
+    NO_PLAN_TIER = ""
+    
+    def __init__(self, cache_manager: RedisCacheManager):
+        self.cache_manager = cache_manager
+    
+    async def get_plans(self) -> Optional[bytes]:
+        """Get serialized subscription plans from cache"""
+        return await self.cache_manager.get(CacheKeyPrefix.BILLING, [self.PLANS_KEY])
+    
+    async def set_plans(self, plans: bytes, ttl: int = 600) -> bool:
+        """Set serialized subscription plans in cache"""
+        return await self.cache_manager.set(CacheKeyPrefix.BILLING, [self.PLANS_KEY], plans, ttl)
+    
+    async def invalidate_plans(self) -> bool:
+        """Invalidate cached subscription plans after a plan write"""
+        return await self.cache_manager.delete(CacheKeyPrefix.BILLING, [self.PLANS_KEY])
+    
+    async def get_plan_tier(self, org_id: str) -> Optional[str]:
+        """Get an organization's cached plan tier; NO_PLAN_TIER means no active subscription"""
+        return await self.cache_manager.get(CacheKeyPrefix.BILLING, [self.PLAN_TIER_KEY, org_id])
+    
+    async def set_plan_tier(self, org_id: str, plan_tier: str, ttl: int = 60) -> bool:
+        """Set an organization's plan tier in cache"""
+        return await self.cache_manager.set(CacheKeyPrefix.BILLING, [self.PLAN_TIER_KEY, org_id], plan_tier, ttl)
+    
+    async def invalidate_plan_tier(self, org_id: str) -> bool:
+        """Invalidate an organization's cached plan tier after a subscription change"""
+        return await self.cache_manager.delete(CacheKeyPrefix.BILLING, [self.PLAN_TIER_KEY, org_id])
+
+
+class TenantCacheService:
+    """Cache service for per-organization aggregate views (folder tree, statistics)
+
+    Entries are keyed under the organization's current generation token, so
+    invalidate_org drops every cached view of an organization with one write.
+    """
+    
+    GENERATION_KEY = "generation"
+    
+    def __init__(self, cache_manager: RedisCacheManager):
+        self.cache_manager = cache_manager
+    
+    async def _generation(self, org_id: str) -> str:
+        """Get the organization's current generation token"""
+        generation = await self.cache_manager.get(CacheKeyPrefix.TENANT, [self.GENERATION_KEY, org_id])
+        return generation or "0"
+    
+    async def get(self, org_id: str, key_parts: List[Any]) -> Optional[Any]:
+        """Get a cached view for an organization"""
+        generation = await self._generation(org_id)
+        return await self.cache_manager.get(CacheKeyPrefix.TENANT, [org_id, generation, *key_parts])
+    
+    async def set(self, org_id: str, key_parts: List[Any], value: Any, ttl: int = 60) -> bool:
+        """Cache a view for an organization"""
+        generation = await self._generation(org_id)
+        return await self.cache_manager.set(CacheKeyPrefix.TENANT, [org_id, generation, *key_parts], value, ttl)
+    
+    async def invalidate_org(self, org_id: str) -> bool:
+        """Invalidate every cached view of an organization after a write"""
+        return await self.cache_manager.set(
+            CacheKeyPrefix.TENANT, [self.GENERATION_KEY, org_id], uuid4().hex, ttl=86400
+        )
+
+
 class CacheServiceFactory:
     """Factory for creating cache services"""
     
@@ -238,6 +310,8 @@ class CacheServiceFactory:
         self.user_cache = UserCacheService(cache_manager)
         self.query_cache = QueryCacheService(cache_manager)
         self.settings_cache = SettingsCacheService(cache_manager)
+        self.billing_cache = BillingCacheService(cache_manager)
+        self.tenant_cache = TenantCacheService(cache_manager)
     
     def get_flow_cache(self) -> FlowCacheService:
         """Get flow cache service"""
@@ -258,6 +332,14 @@ class CacheServiceFactory:
     def get_settings_cache(self) -> SettingsCacheService:
         """Get settings cache service"""
         return self.settings_cache
+    
+    def get_billing_cache(self) -> BillingCacheService:
+        """Get billing cache service"""
+        return self.billing_cache
+    
+    def get_tenant_cache(self) -> TenantCacheService:
+        """Get tenant cache service"""
+        return self.tenant_cache
 
 
 # Global cache service factory
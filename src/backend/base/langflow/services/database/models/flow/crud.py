@@ -1,8 +1,10 @@
 """Multi-tenant CRUD operations for Flow model"""
+from datetime import datetime
 from typing import List, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, cast, func, insert, literal_column, tuple_
+from sqlalchemy.orm import raiseload
 from sqlmodel.ext.asyncio import AsyncSession
 
 from langflow.services.database.models.flow.model import Flow, FlowCreate, FlowUpdate
@@ -10,6 +12,14 @@ from langflow.services.database.models.folder.model import Folder
 from langflow.middleware.tenant_context import TenantContextManager
 
 
+# FlowRead 只读取列属性；列表查询禁止关系懒加载，避免序列化时出现 N+1 查询
+FLOW_LIST_OPTIONS = (raiseload("*"),)
+
+# updated_at 可为空；排序和游标比较共用同一个非空表达式，空值视为 -infinity 排在最后
+_NULL_UPDATED_AT = cast(literal_column("'-infinity'"), Flow.updated_at.type)
+FLOW_RECENCY_KEY = func.coalesce(Flow.updated_at, _NULL_UPDATED_AT)
+
+
 class FlowCRUD:
     """Multi-tenant CRUD operations for Flow model"""
     
@@ -37,6 +47,36 @@ class FlowCRUD:
         
         return flow
     
+    @staticmethod
+    async def create_flows_bulk(
+        session: AsyncSession,
+        flows_data: Sequence[FlowCreate],
+        organization_id: str,
+        user_id: str
+    ) -> List[Flow]:
+        """批量创建流程，单条 INSERT ... RETURNING 并只提交一次"""
+        if not flows_data:
+            return []
+
+        await TenantContextManager.set_organization_context(session, organization_id)
+
+        # 先构造模型以应用默认值（id、tags 等），再一次性插入
+        values = [
+            Flow(
+                **flow_data.model_dump(exclude_unset=True),
+                organization_id=organization_id,
+                user_id=user_id
+            ).model_dump()
+            for flow_data in flows_data
+        ]
+        # executemany RETURNING 不保证行顺序；按参数顺序返回，结果与 flows_data 一一对应
+        stmt = insert(Flow).returning(Flow, sort_by_parameter_order=True).execution_options(populate_existing=True)
+        result = await session.execute(stmt, values)
+        flows = list(result.scalars().all())
+        await session.commit()
+
+        return flows
+
     @staticmethod
     async def get_flow_by_id(
         session: AsyncSession,
@@ -50,6 +90,26 @@ class FlowCRUD:
         result = await session.exec(stmt)
         return result.first()
     
+    @staticmethod
+    async def get_flows_by_ids(
+        session: AsyncSession,
+        flow_ids: Sequence[UUID],
+        organization_id: str
+    ) -> List[Flow]:
+        """根据ID列表批量获取流程（单次 IN 查询），按输入顺序返回"""
+        if not flow_ids:
+            return []
+
+        await TenantContextManager.set_organization_context(session, organization_id)
+
+        stmt = select(Flow).options(*FLOW_LIST_OPTIONS).where(
+            Flow.id.in_(flow_ids),
+            Flow.organization_id == organization_id
+        )
+        result = await session.exec(stmt)
+        flows_by_id = {flow.id: flow for flow in result.scalars()}
+        return [flows_by_id[flow_id] for flow_id in dict.fromkeys(flow_ids) if flow_id in flows_by_id]
+
     @staticmethod
     async def get_flows_by_user(
         session: AsyncSession,
@@ -57,17 +117,27 @@ class FlowCRUD:
         organization_id: str,
         folder_id: Optional[str] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[tuple[Optional[datetime], UUID]] = None
     ) -> List[Flow]:
-        """获取用户在指定组织中的流程"""
+        """获取用户在指定组织中的流程
+        
+        传入 after=(updated_at, id) 时使用键集分页，只返回排在该游标之后的流程，
+        无需扫描并丢弃 offset 之前的行；updated_at 为 None 表示游标停在空值行上
+        """
         await TenantContextManager.set_organization_context(session, organization_id)
         
-        stmt = select(Flow).where(Flow.user_id == user_id)
+        stmt = select(Flow).options(*FLOW_LIST_OPTIONS).where(Flow.user_id == user_id)
         
         if folder_id:
             stmt = stmt.where(Flow.folder_id == folder_id)
         
-        stmt = stmt.offset(offset).limit(limit).order_by(Flow.updated_at.desc())
+        if after is not None:
+            after_updated_at, after_id = after
+            after_key = _NULL_UPDATED_AT if after_updated_at is None else after_updated_at
+            stmt = stmt.where(tuple_(FLOW_RECENCY_KEY, Flow.id) < tuple_(after_key, after_id))
+        
+        stmt = stmt.order_by(FLOW_RECENCY_KEY.desc(), Flow.id.desc()).offset(offset).limit(limit)
         
         result = await session.exec(stmt)
         return list(result.fetchall())
@@ -83,7 +153,7 @@ class FlowCRUD:
         """获取组织中的所有流程（管理员视图）"""
         await TenantContextManager.set_organization_context(session, organization_id)
         
-        stmt = select(Flow)
+        stmt = select(Flow).options(*FLOW_LIST_OPTIONS)
         
         if search_query:
             search_filter = or_(
@@ -156,7 +226,7 @@ class FlowCRUD:
         await TenantContextManager.bypass_rls(session)
         
         try:
-            stmt = select(Flow).where(
+            stmt = select(Flow).options(*FLOW_LIST_OPTIONS).where(
                 Flow.access_type == 'PUBLIC'
             ).offset(offset).limit(limit).order_by(Flow.updated_at.desc())
             
@@ -298,7 +368,7 @@ class FlowCRUD:
         # 搜索当前组织的流程
         await TenantContextManager.set_organization_context(session, organization_id)
         
-        org_stmt = select(Flow).where(
+        org_stmt = select(Flow).options(*FLOW_LIST_OPTIONS).where(
             or_(
                 Flow.name.ilike(f"%{query}%"),
                 Flow.description.ilike(f"%{query}%")
@@ -320,7 +390,7 @@ class FlowCRUD:
             await TenantContextManager.bypass_rls(session)
             
             try:
-                public_stmt = select(Flow).where(
+                public_stmt = select(Flow).options(*FLOW_LIST_OPTIONS).where(
                     and_(
                         Flow.access_type == 'PUBLIC',
                         or_(
@@ -17,7 +17,7 @@ from pydantic import (
     field_validator,
 )
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import Text, UniqueConstraint, text
+from sqlalchemy import Index, Text, UniqueConstraint, text
 from sqlmodel import JSON, Column, Field, Relationship, SQLModel
 
 from langflow.schema.data import Data
@@ -202,7 +202,7 @@ class Flow(FlowBase, table=True):  # type: ignore[call-arg]
     folder: Optional["Folder"] = Relationship(back_populates="flows")
     
     # Multi-tenant support
-    organization_id: str = Field(foreign_key="organization.id", index=True)
+    organization_id: UUID = Field(foreign_key="organization.id", index=True)
     organization: "Organization" = Relationship()
 
     def to_data(self):
@@ -219,6 +219,15 @@ class Flow(FlowBase, table=True):  # type: ignore[call-arg]
     __table_args__ = (
         UniqueConstraint("user_id", "name", name="unique_flow_name"),
         UniqueConstraint("user_id", "endpoint_name", name="unique_flow_endpoint_name"),
+        # Flow list queries filter by tenant, owner and folder and order by updated_at
+        Index("ix_flow_org_user_folder_updated", "organization_id", "user_id", "folder_id", "updated_at"),
+        Index("ix_flow_org_updated", "organization_id", "updated_at"),
+        Index(
+            "ix_flow_public_updated",
+            "access_type",
+            "updated_at",
+            postgresql_where=text("access_type = 'PUBLIC'"),
+        ),
     )
 
 
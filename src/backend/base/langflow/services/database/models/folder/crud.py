@@ -1,8 +1,11 @@
 """Multi-tenant CRUD operations for Folder model"""
+from collections import defaultdict
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, func, exists, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel.ext.asyncio import AsyncSession
 
 from langflow.services.database.models.folder.model import Folder, FolderCreate, FolderUpdate
@@ -38,6 +41,35 @@ class FolderCRUD:
         
         return folder
     
+    @staticmethod
+    async def create_folder_if_unique(
+        session: AsyncSession,
+        folder_data: FolderCreate,
+        organization_id: str,
+        user_id: str
+    ) -> Optional[Folder]:
+        """创建文件夹；组织内名称已存在时返回None
+        
+        单条 INSERT ... ON CONFLICT DO NOTHING RETURNING，冲突目标为 unique_folder_name_per_org
+        """
+        await TenantContextManager.set_organization_context(session, organization_id)
+        
+        values = Folder(
+            name=folder_data.name,
+            description=folder_data.description,
+            organization_id=organization_id,
+            user_id=UUID(user_id)
+        ).model_dump()
+        stmt = pg_insert(Folder).values(**values).on_conflict_do_nothing(
+            index_elements=["organization_id", "name"]
+        ).returning(Folder).execution_options(populate_existing=True)
+        
+        result = await session.execute(stmt)
+        folder = result.scalars().first()
+        await session.commit()
+        
+        return folder
+    
     @staticmethod
     async def get_folder_by_id(
         session: AsyncSession,
@@ -134,38 +166,51 @@ class FolderCRUD:
         user_id: Optional[str] = None,
         root_folder_id: Optional[UUID] = None
     ) -> List[dict]:
-        """获取文件夹树形结构"""
+        """获取文件夹树形结构
+        
+        递归CTE只取出 root_folder_id 下的子树（一次查询），再按 parent_id 分组一次拼成嵌套结构
+        """
         await TenantContextManager.set_organization_context(session, organization_id)
         
-        # 构建基础查询
-        stmt = select(Folder)
+        def with_filters(stmt, model):
+            if user_id:
+                stmt = stmt.where(model.user_id == UUID(user_id))
+            return stmt
         
-        if user_id:
-            stmt = stmt.where(Folder.user_id == UUID(user_id))
+        # 锚点：根文件夹的直接子文件夹
+        anchor = select(
+            Folder.id, Folder.name, Folder.description, Folder.user_id, Folder.parent_id
+        ).where(
+            Folder.parent_id == root_folder_id if root_folder_id else Folder.parent_id.is_(None)
+        )
+        tree = with_filters(anchor, Folder).cte("folder_tree", recursive=True)
+        
+        # 递归：逐层向下取子文件夹
+        child = aliased(Folder)
+        tree = tree.union_all(
+            with_filters(
+                select(child.id, child.name, child.description, child.user_id, child.parent_id).join(
+                    tree, child.parent_id == tree.c.id
+                ),
+                child
+            )
+        )
         
-        stmt = stmt.order_by(Folder.name)
-        result = await session.exec(stmt)
-        all_folders = list(result.fetchall())
-        
-        # 构建树形结构
-        folder_map = {folder.id: folder for folder in all_folders}
-        
-        def build_tree(parent_id: Optional[UUID]) -> List[dict]:
-            children = []
-            for folder in all_folders:
-                if folder.parent_id == parent_id:
-                    folder_dict = {
-                        "id": str(folder.id),
-                        "name": folder.name,
-                        "description": folder.description,
-                        "user_id": str(folder.user_id),
-                        "parent_id": str(folder.parent_id) if folder.parent_id else None,
-                        "children": build_tree(folder.id)
-                    }
-                    children.append(folder_dict)
-            return children
-        
-        return build_tree(root_folder_id)
+        result = await session.exec(select(tree).order_by(tree.c.name))
+        
+        # 按名称顺序挂到各自父节点下，每层的子节点保持名称排序
+        children_by_parent: dict[Optional[UUID], List[dict]] = defaultdict(list)
+        for folder in result.all():
+            children_by_parent[folder.parent_id].append({
+                "id": str(folder.id),
+                "name": folder.name,
+                "description": folder.description,
+                "user_id": str(folder.user_id),
+                "parent_id": str(folder.parent_id) if folder.parent_id else None,
+                "children": children_by_parent[folder.id]
+            })
+        
+        return children_by_parent[root_folder_id]
     
     @staticmethod
     async def update_folder(
@@ -174,28 +219,41 @@ class FolderCRUD:
         folder_update: FolderUpdate,
         organization_id: str
     ) -> Optional[Folder]:
-        """更新文件夹"""
-        await TenantContextManager.set_organization_context(session, organization_id)
+        """更新文件夹
         
-        # 由于RLS，这个查询只会返回属于当前组织的文件夹
-        stmt = select(Folder).where(Folder.id == folder_id)
-        result = await session.exec(stmt)
-        folder = result.first()
-        
-        if not folder:
-            return None
+        单条 UPDATE ... WHERE NOT EXISTS(...) RETURNING 完成名称唯一性检查和更新；
+        文件夹不存在、父文件夹指向自身或新名称在组织内冲突时返回None
+        """
+        await TenantContextManager.set_organization_context(session, organization_id)
         
         # 检查父文件夹循环引用
-        if folder_update.parent_id and folder_update.parent_id == folder.id:
+        if folder_update.parent_id and folder_update.parent_id == folder_id:
             return None
         
-        # 更新字段
         update_data = folder_update.model_dump(exclude_unset=True, exclude={"components", "flows"})
-        for key, value in update_data.items():
-            setattr(folder, key, value)
+        if not update_data:
+            return await FolderCRUD.get_folder_by_id(session, folder_id, organization_id)
         
+        stmt = update(Folder).where(
+            Folder.id == folder_id,
+            Folder.organization_id == organization_id
+        )
+        
+        # 名称在组织内唯一（unique_folder_name_per_org）
+        if "name" in update_data:
+            other = aliased(Folder)
+            stmt = stmt.where(
+                ~exists().where(
+                    other.name == update_data["name"],
+                    other.organization_id == Folder.organization_id,
+                    other.id != Folder.id
+                )
+            )
+        
+        stmt = stmt.values(**update_data).returning(Folder).execution_options(populate_existing=True)
+        result = await session.execute(stmt)
+        folder = result.scalars().first()
         await session.commit()
-        await session.refresh(folder)
         
         return folder
     
@@ -32,7 +32,7 @@ class Folder(FolderBase, table=True):  # type: ignore[call-arg]
     )
     
     # Multi-tenant support
-    organization_id: str = Field(foreign_key="organization.id", index=True)
+    organization_id: UUID = Field(foreign_key="organization.id", index=True)
     organization: "Organization" = Relationship()
 
     __table_args__ = (UniqueConstraint("organization_id", "name", name="unique_folder_name_per_org"),)
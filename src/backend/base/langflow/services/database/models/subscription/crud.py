@@ -1,17 +1,26 @@
 """CRUD operations for subscription models"""
 from datetime import datetime, timezone
-from typing import Optional, List
+from typing import Any, Optional, List
 from uuid import UUID
 
-from sqlalchemy import select, and_, desc, func
+from cachetools import TTLCache
+from sqlalchemy import Float, cast, select, and_, desc, func
 from sqlmodel.ext.asyncio import AsyncSession
 
+from langflow.services.cache.services import BillingCacheService, get_cache_service_factory
+
 from .model import (
     Organization, OrganizationMember, OrganizationRole,
     SubscriptionPlan, Subscription, SubscriptionStatus, 
     UsageMetric, MetricType, Invoice, UsageSummary
 )
 
+# 用户 -> 所属组织ID集合的短期缓存，用于每个请求的成员校验
+_user_org_ids_cache: TTLCache = TTLCache(maxsize=8192, ttl=60)
+
+# 组织 -> 订阅等级的进程内短期缓存，Redis中的副本供多个worker共享
+_plan_tier_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
 
 class OrganizationCRUD:
     """组织相关的CRUD操作"""
@@ -37,18 +46,17 @@ class OrganizationCRUD:
             website=website,
             industry=industry
         )
-        session.add(org)
-        await session.commit()
-        await session.refresh(org)
-        
-        # 自动添加所有者为管理员
+        # 自动添加所有者为管理员；ID在应用侧生成，组织与成员在同一事务中提交，
+        # slug冲突由唯一约束以IntegrityError的形式抛出
         member = OrganizationMember(
             organization_id=org.id,
             user_id=owner_id,
             role=OrganizationRole.OWNER
         )
-        session.add(member)
+        session.add_all([org, member])
         await session.commit()
+        await session.refresh(org)
+        OrganizationCRUD.invalidate_user_org_ids(owner_id)
         
         return org
     
@@ -59,6 +67,20 @@ class OrganizationCRUD:
         result = await session.exec(stmt)
         return result.first()
     
+    @staticmethod
+    async def get_accessible_org(
+        session: AsyncSession,
+        org_id: str,
+        user_id: str
+    ) -> Optional[Organization]:
+        """获取用户有权访问的组织（组织查询与成员校验合并为一次JOIN）"""
+        stmt = select(Organization).join(OrganizationMember).where(
+            Organization.id == org_id,
+            OrganizationMember.user_id == user_id
+        ).limit(1)
+        result = await session.exec(stmt)
+        return result.first()
+    
     @staticmethod
     async def get_organization_by_slug(session: AsyncSession, slug: str) -> Optional[Organization]:
         """根据slug获取组织"""
@@ -75,6 +97,24 @@ class OrganizationCRUD:
         result = await session.exec(stmt)
         return list(result.fetchall())
     
+    @staticmethod
+    async def get_user_org_ids(session: AsyncSession, user_id: str) -> frozenset[str]:
+        """获取用户所属组织的ID集合（仅查询ID，结果缓存60秒）"""
+        org_ids = _user_org_ids_cache.get(user_id)
+        if org_ids is None:
+            stmt = select(OrganizationMember.organization_id).where(
+                OrganizationMember.user_id == user_id
+            )
+            result = await session.exec(stmt)
+            org_ids = frozenset(str(org_id) for org_id in result.scalars())
+            _user_org_ids_cache[user_id] = org_ids
+        return org_ids
+    
+    @staticmethod
+    def invalidate_user_org_ids(user_id: str) -> None:
+        """成员关系变更后清除用户的组织ID缓存"""
+        _user_org_ids_cache.pop(str(user_id), None)
+    
     @staticmethod
     async def add_member(
         session: AsyncSession,
@@ -91,6 +131,7 @@ class OrganizationCRUD:
         session.add(member)
         await session.commit()
         await session.refresh(member)
+        OrganizationCRUD.invalidate_user_org_ids(user_id)
         return member
 
 
@@ -154,8 +195,42 @@ class SubscriptionCRUD:
         session.add(subscription)
         await session.commit()
         await session.refresh(subscription)
+        await SubscriptionCRUD.invalidate_plan_tier(organization_id)
         return subscription
     
+    @staticmethod
+    async def get_organization_plan_tier(session: AsyncSession, org_id: str) -> Optional[str]:
+        """获取组织当前订阅的等级，没有有效订阅时返回None
+        
+        依次查询进程内缓存、Redis和数据库，数据库只读取plan_type一列
+        """
+        plan_tier = _plan_tier_cache.get(org_id)
+        if plan_tier is None:
+            billing_cache = (await get_cache_service_factory()).get_billing_cache()
+            plan_tier = await billing_cache.get_plan_tier(org_id)
+            if plan_tier is None:
+                stmt = select(SubscriptionPlan.plan_type).join(
+                    Subscription, Subscription.plan_id == SubscriptionPlan.id
+                ).where(
+                    and_(
+                        Subscription.organization_id == org_id,
+                        Subscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING])
+                    )
+                ).order_by(desc(Subscription.created_at)).limit(1)
+                result = await session.exec(stmt)
+                plan_type = result.scalars().first()
+                plan_tier = plan_type.value if plan_type else BillingCacheService.NO_PLAN_TIER
+                await billing_cache.set_plan_tier(org_id, plan_tier)
+            _plan_tier_cache[org_id] = plan_tier
+        return plan_tier or None
+    
+    @staticmethod
+    async def invalidate_plan_tier(org_id: str) -> None:
+        """订阅变更后清除组织的订阅等级缓存"""
+        _plan_tier_cache.pop(str(org_id), None)
+        billing_cache = (await get_cache_service_factory()).get_billing_cache()
+        await billing_cache.invalidate_plan_tier(str(org_id))
+    
     @staticmethod
     async def get_organization_subscription(
         session: AsyncSession, 
@@ -188,6 +263,7 @@ class SubscriptionCRUD:
             subscription.updated_at = datetime.now(timezone.utc)
             await session.commit()
             await session.refresh(subscription)
+            await SubscriptionCRUD.invalidate_plan_tier(subscription.organization_id)
         
         return subscription
 
@@ -225,6 +301,37 @@ class UsageMetricCRUD:
         await session.refresh(metric)
         return metric
     
+    @staticmethod
+    async def record_usage_batch(
+        session: AsyncSession,
+        organization_id: str,
+        totals: dict[MetricType, int]
+    ) -> List[UsageMetric]:
+        """批量记录聚合后的使用量（一次计费周期查询、一次提交）"""
+        if not totals:
+            return []
+        
+        now = datetime.now(timezone.utc)
+        period_start, period_end = await UsageMetricCRUD._get_current_billing_period(
+            session, organization_id
+        )
+        
+        metrics = [
+            UsageMetric(
+                organization_id=organization_id,
+                metric_type=metric_type,
+                value=value,
+                recorded_at=now,
+                period_start=period_start,
+                period_end=period_end,
+                metadata={'aggregated': True}
+            )
+            for metric_type, value in totals.items()
+        ]
+        session.add_all(metrics)
+        await session.commit()
+        return metrics
+    
     @staticmethod
     async def get_usage_summary(
         session: AsyncSession,
@@ -375,4 +482,28 @@ class InvoiceCRUD:
         ).order_by(desc(Invoice.created_at)).limit(limit)
         
         result = await session.exec(stmt)
-        return list(result.fetchall())
\ No newline at end of file
+        return list(result.fetchall())
+    
+    @staticmethod
+    async def list_invoice_rows(
+        session: AsyncSession,
+        organization_id: str,
+        limit: int = 50
+    ) -> List[dict[str, Any]]:
+        """只查询发票列表所需的列，金额在SQL中转换为浮点数"""
+        stmt = select(
+            Invoice.id,
+            Invoice.invoice_number,
+            cast(Invoice.amount, Float).label("amount"),
+            Invoice.currency,
+            Invoice.status,
+            Invoice.period_start,
+            Invoice.period_end,
+            Invoice.created_at,
+            Invoice.hosted_invoice_url,
+        ).join(Subscription).where(
+            Subscription.organization_id == organization_id
+        ).order_by(desc(Invoice.created_at)).limit(limit)
+        
+        result = await session.execute(stmt)
+        return [dict(row) for row in result.mappings()]
\ No newline at end of file
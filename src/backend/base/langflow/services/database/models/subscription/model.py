@@ -1,10 +1,12 @@
+import os
+import time
 from datetime import datetime, timezone
 from enum import Enum
 from typing import TYPE_CHECKING, Optional
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from pydantic import BaseModel, validator
-from sqlalchemy import JSON, Column, Decimal
+from sqlalchemy import JSON, Column, Decimal, UniqueConstraint
 from sqlmodel import Field, Relationship, SQLModel
 
 from langflow.schema.serialize import UUIDstr
@@ -13,6 +15,20 @@ if TYPE_CHECKING:
     from langflow.services.database.models.user.model import User
 
 
+def uuid7() -> UUID:
+    """生成时间有序的 UUIDv7（RFC 9562），使新行按创建时间聚簇在 btree 索引末端"""
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | (rand >> 62 & 0xFFF) << 64
+        | 0b10 << 62
+        | rand & 0x3FFF_FFFF_FFFF_FFFF
+    )
+    return UUID(int=value)
+
+
 class PlanType(str, Enum):
     FREE = "free"
     BASIC = "basic"
@@ -40,7 +56,7 @@ class MetricType(str, Enum):
 
 class Organization(SQLModel, table=True):  # type: ignore[call-arg]
     """组织/团队模型 - 支持多租户架构"""
-    id: UUIDstr = Field(default_factory=uuid4, primary_key=True, unique=True)
+    id: UUIDstr = Field(default_factory=uuid7, primary_key=True, unique=True)
     name: str = Field(max_length=255, index=True)
     slug: str = Field(max_length=100, unique=True, index=True)  # URL友好的标识符
     description: Optional[str] = Field(default=None, max_length=500)
@@ -72,7 +88,7 @@ class OrganizationRole(str, Enum):
 
 class OrganizationMember(SQLModel, table=True):  # type: ignore[call-arg]
     """组织成员模型"""
-    id: UUIDstr = Field(default_factory=uuid4, primary_key=True, unique=True)
+    id: UUIDstr = Field(default_factory=uuid7, primary_key=True, unique=True)
     organization_id: UUIDstr = Field(foreign_key="organization.id")
     user_id: UUIDstr = Field(foreign_key="user.id")
     role: OrganizationRole = Field(default=OrganizationRole.MEMBER)
@@ -87,6 +103,8 @@ class OrganizationMember(SQLModel, table=True):  # type: ignore[call-arg]
     organization: Organization = Relationship(back_populates="members")
     user: "User" = Relationship(back_populates="organization_memberships")
 
+    __table_args__ = (UniqueConstraint("organization_id", "user_id", name="unique_member_per_org"),)
+
 
 class SubscriptionPlan(SQLModel, table=True):  # type: ignore[call-arg]
     """订阅计划模型 - 定义不同的定价层次"""
@@ -2,7 +2,9 @@
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, func, exists, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel.ext.asyncio import AsyncSession
 
 from langflow.services.database.models.variable.model import Variable, VariableCreate, VariableUpdate
@@ -36,6 +38,36 @@ class VariableCRUD:
         
         return variable
     
+    @staticmethod
+    async def create_variable_if_unique(
+        session: AsyncSession,
+        variable_data: VariableCreate,
+        organization_id: str,
+        user_id: str
+    ) -> Optional[Variable]:
+        """创建变量；同一组织和用户下名称已存在时返回None
+        
+        单条 INSERT ... ON CONFLICT DO NOTHING RETURNING，由唯一索引原子地保证名称唯一
+        """
+        await TenantContextManager.set_organization_context(session, organization_id)
+        
+        # 先构造模型以应用默认值（id等），再插入；为None的列不写入，
+        # 避免显式NULL覆盖 created_at 等列的数据库默认值
+        values = Variable(
+            **variable_data.model_dump(exclude_unset=True),
+            organization_id=organization_id,
+            user_id=UUID(user_id)
+        ).model_dump(exclude_none=True)
+        stmt = pg_insert(Variable).values(**values).on_conflict_do_nothing(
+            index_elements=["organization_id", "user_id", "name"]
+        ).returning(Variable).execution_options(populate_existing=True)
+        
+        result = await session.execute(stmt)
+        variable = result.scalars().first()
+        await session.commit()
+        
+        return variable
+    
     @staticmethod
     async def get_variable_by_id(
         session: AsyncSession,
@@ -122,24 +154,37 @@ class VariableCRUD:
         variable_update: VariableUpdate,
         organization_id: str
     ) -> Optional[Variable]:
-        """更新变量"""
+        """更新变量
+        
+        单条 UPDATE ... WHERE NOT EXISTS(...) RETURNING 完成名称唯一性检查和更新；
+        变量不存在或新名称与同一用户的其他变量冲突时返回None
+        """
         await TenantContextManager.set_organization_context(session, organization_id)
         
-        # 由于RLS，这个查询只会返回属于当前组织的变量
-        stmt = select(Variable).where(Variable.id == variable_id)
-        result = await session.exec(stmt)
-        variable = result.first()
+        update_data = variable_update.model_dump(exclude_unset=True, exclude={"id"})
+        if not update_data:
+            return await VariableCRUD.get_variable_by_id(session, variable_id, organization_id)
         
-        if not variable:
-            return None
+        stmt = update(Variable).where(
+            Variable.id == variable_id,
+            Variable.organization_id == organization_id
+        )
         
-        # 更新字段
-        update_data = variable_update.model_dump(exclude_unset=True, exclude={"id"})
-        for key, value in update_data.items():
-            setattr(variable, key, value)
+        if "name" in update_data:
+            other = aliased(Variable)
+            stmt = stmt.where(
+                ~exists().where(
+                    other.name == update_data["name"],
+                    other.organization_id == Variable.organization_id,
+                    other.user_id == Variable.user_id,
+                    other.id != Variable.id
+                )
+            )
         
+        stmt = stmt.values(**update_data).returning(Variable).execution_options(populate_existing=True)
+        result = await session.execute(stmt)
+        variable = result.scalars().first()
         await session.commit()
-        await session.refresh(variable)
         
         return variable
     
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
 
 from pydantic import ValidationInfo, field_validator
+from sqlalchemy import UniqueConstraint
 from sqlmodel import JSON, Column, DateTime, Field, Relationship, SQLModel, func
 
 from langflow.services.variable.constants import CREDENTIAL_TYPE
@@ -46,9 +47,13 @@ class Variable(VariableBase, table=True):  # type: ignore[call-arg]
     user: "User" = Relationship(back_populates="variables")
     
     # Multi-tenant support
-    organization_id: str = Field(foreign_key="organization.id", index=True)
+    organization_id: UUID = Field(foreign_key="organization.id", index=True)
     organization: "Organization" = Relationship()
 
+    __table_args__ = (
+        UniqueConstraint("organization_id", "user_id", "name", name="unique_variable_name_per_org_user"),
+    )
+
 
 class VariableCreate(VariableBase):
     created_at: datetime | None = Field(default_factory=utc_now, description="Creation time of the variable")
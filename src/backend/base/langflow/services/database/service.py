@@ -13,6 +13,8 @@ import anyio
 import sqlalchemy as sa
 from alembic import command, util
 from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from loguru import logger
 from sqlalchemy import event, exc, inspect
 from sqlalchemy.dialects import sqlite as dialect_sqlite
@@ -358,7 +360,29 @@ class DatabaseService(Service):
             if fix:
                 self.try_downgrade_upgrade_until_success(alembic_cfg)
 
+    async def check_migrations_at_head(self) -> None:
+        """Verify the database revision without upgrading it.
+
+        Used when migrations are applied out-of-band, so a long-running data
+        migration does not block application startup.
+        """
+        expected_heads = set(ScriptDirectory(str(self.script_location)).get_heads())
+        async with self.with_session() as session, session.bind.connect() as conn:
+            current_heads = set(
+                await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_heads())
+            )
+        if current_heads != expected_heads:
+            logger.warning(
+                f"Database is at revision {sorted(current_heads)}, expected {sorted(expected_heads)}. "
+                "Migrations are expected to be applied out-of-band with `alembic upgrade head`."
+            )
+        else:
+            logger.debug("Database is at the head revision")
+
     async def run_migrations(self, *, fix=False) -> None:
+        if self.settings_service.settings.migration_mode == "async":
+            await self.check_migrations_at_head()
+            return
         should_initialize_alembic = False
         async with self.with_session() as session:
             # If the table does not exist it throws an error
@@ -82,6 +82,10 @@ class Settings(BaseSettings):
     `postgresql+psycopg` respectively)."""
     database_connection_retry: bool = False
     """If True, Langflow will retry to connect to the database if it fails."""
+    migration_mode: Literal["sync", "async"] = "sync"
+    """How database migrations are applied. With `sync`, Langflow upgrades the database to head on startup.
+    With `async`, migrations are run out-of-band (e.g. `alembic upgrade head` from a dedicated job) and startup
+    only verifies that the database is at the head revision."""
     pool_size: int = 20
     """The number of connections to keep open in the connection pool.
     For high load scenarios, this should be increased based on expected concurrent users."""
@@ -1,14 +1,32 @@
 import gzip
-import json
 from typing import Any
 
+import orjson
 from fastapi import Response
 from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Encode values orjson does not support natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def dump_json(data: Any) -> bytes:
+    """Serialize data to JSON bytes in a single pass with orjson."""
+    return orjson.dumps(data, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(data: Any) -> Response:
+    """Return data as a JSON Response, bypassing FastAPI's response serialization."""
+    return Response(content=dump_json(data), media_type="application/json")
 
 
 def compress_response(data: Any) -> Response:
     """Compress data and return it as a FastAPI Response with appropriate headers."""
-    json_data = json.dumps(jsonable_encoder(data)).encode("utf-8")
+    json_data = dump_json(data)
 
     compressed_data = gzip.compress(json_data, compresslevel=6)
 
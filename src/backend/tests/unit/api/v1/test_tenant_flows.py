@@ -0,0 +1,97 @@
+import base64
+import io
+import zipfile
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from langflow.api.v1.tenant_flows import _decode_flow_cursor, _encode_flow_cursor, _iter_flows_zip
+from langflow.services.database.models.flow.model import Flow
+
+
+def _flow(name: str = "flow", **kwargs) -> Flow:
+    return Flow(id=uuid4(), name=name, data={"nodes": [], "edges": []}, **kwargs)
+
+
+def test_flow_cursor_round_trip():
+    flow = _flow(updated_at=datetime(2025, 1, 5, 10, 30, 15, 123456, tzinfo=timezone.utc))
+
+    assert _decode_flow_cursor(_encode_flow_cursor(flow)) == (flow.updated_at, flow.id)
+
+
+def test_flow_cursor_round_trip_naive_timestamp():
+    flow = _flow(updated_at=datetime(2025, 1, 5, 10, 30, 15))  # noqa: DTZ001
+
+    assert _decode_flow_cursor(_encode_flow_cursor(flow)) == (flow.updated_at, flow.id)
+
+
+def test_flow_cursor_round_trip_null_updated_at():
+    flow = _flow(updated_at=None)
+
+    assert _decode_flow_cursor(_encode_flow_cursor(flow)) == (None, flow.id)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"not json",
+        b"[]",
+        b'"text"',
+        b"{}",
+        b'{"updated_at": null}',
+        b'{"updated_at": "not a date", "id": "00000000-0000-0000-0000-000000000000"}',
+        b'{"updated_at": 5, "id": "00000000-0000-0000-0000-000000000000"}',
+        b'{"updated_at": null, "id": "not a uuid"}',
+        b'{"updated_at": null, "id": 5}',
+    ],
+)
+def test_decode_flow_cursor_rejects_invalid_payload(payload):
+    with pytest.raises(HTTPException) as exc_info:
+        _decode_flow_cursor(base64.urlsafe_b64encode(payload).decode())
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["", "%%%", "a"])
+def test_decode_flow_cursor_rejects_invalid_base64(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        _decode_flow_cursor(cursor)
+
+    assert exc_info.value.status_code == 400
+
+
+def test_iter_flows_zip_produces_valid_archive():
+    secret_node = {
+        "data": {
+            "node": {
+                "template": {
+                    "openai_api_key": {"name": "openai_api_key", "password": True, "value": "sk-secret"},
+                }
+            }
+        }
+    }
+    flows = [
+        _flow("first"),
+        Flow(id=uuid4(), name="second", data={"nodes": [secret_node], "edges": []}),
+    ]
+
+    archive = b"".join(_iter_flows_zip(flows))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ["first.json", "second.json"]
+        assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in zip_file.infolist())
+        exported = orjson.loads(zip_file.read("second.json"))
+
+    assert exported["name"] == "second"
+    template = exported["data"]["nodes"][0]["data"]["node"]["template"]
+    assert template["openai_api_key"]["value"] is None
+
+
+def test_iter_flows_zip_empty():
+    archive = b"".join(_iter_flows_zip([]))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        assert zip_file.namelist() == []
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from typing import Annotated
+
+from fastapi import Depends, Request
+from langflow.decorators.quota import _bind_context_params, _ContextParams, _resolve_session_and_org
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def _request_with_tenant(organization_id: str) -> Request:
+    request = Request({"type": "http", "headers": []})
+    request.state.tenant_ctx = SimpleNamespace(organization_id=organization_id)
+    return request
+
+
+def test_bind_context_params_by_name():
+    async def endpoint(session, org_id, request, other):
+        pass
+
+    assert _bind_context_params(endpoint) == _ContextParams("session", "org_id", "request")
+
+
+def test_bind_context_params_by_annotation():
+    async def endpoint(db: Annotated[AsyncSession, Depends()], organization_id: str, http_request: Request):
+        pass
+
+    assert _bind_context_params(endpoint) == _ContextParams("db", "organization_id", "http_request")
+
+
+def test_bind_context_params_missing():
+    async def endpoint(name: str):
+        pass
+
+    assert _bind_context_params(endpoint) == _ContextParams(None, None, None)
+
+
+def test_resolve_session_and_org_from_kwargs():
+    session = AsyncSession()
+    params = _ContextParams("session", "org_id", None)
+
+    assert _resolve_session_and_org({"session": session, "org_id": "org-1"}, params) == (session, "org-1")
+
+
+def test_resolve_session_and_org_prefers_tenant_context():
+    session = AsyncSession()
+    params = _ContextParams("session", "org_id", "request")
+    kwargs = {"session": session, "org_id": "org-1", "request": _request_with_tenant("org-ctx")}
+
+    assert _resolve_session_and_org(kwargs, params) == (session, "org-ctx")
+
+
+def test_resolve_session_and_org_falls_back_without_tenant_context():
+    params = _ContextParams(None, "org_id", "request")
+    kwargs = {"org_id": "org-1", "request": Request({"type": "http", "headers": []})}
+
+    assert _resolve_session_and_org(kwargs, params) == (None, "org-1")
+
+
+def test_resolve_session_and_org_rejects_wrong_types():
+    params = _ContextParams("session", "org_id", None)
+
+    assert _resolve_session_and_org({"session": object(), "org_id": 42}, params) == (None, None)
@@ -0,0 +1,97 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+import pytest
+from langflow.services.billing import usage_service
+from langflow.services.billing.usage_service import UsageService, _UsageBuffer
+from langflow.services.database.models.subscription.model import MetricType
+
+
+def test_usage_buffer_merges_deltas_per_organization_and_metric():
+    buffer = _UsageBuffer()
+    buffer.add("org-1", MetricType.API_CALLS, 1)
+    buffer.add("org-1", MetricType.API_CALLS, 2)
+    buffer.add("org-1", MetricType.FLOW_EXECUTIONS, 1)
+    buffer.add("org-2", MetricType.API_CALLS, 5)
+
+    assert buffer.events == 4
+    assert buffer.drain() == {
+        "org-1": {MetricType.API_CALLS: 3, MetricType.FLOW_EXECUTIONS: 1},
+        "org-2": {MetricType.API_CALLS: 5},
+    }
+
+
+def test_usage_buffer_drain_empties_buffer():
+    buffer = _UsageBuffer()
+    buffer.add("org-1", MetricType.API_CALLS, 1)
+    buffer.drain()
+
+    assert buffer.events == 0
+    assert buffer.drain() == {}
+
+
+def test_usage_buffer_drain_skips_zero_deltas():
+    buffer = _UsageBuffer()
+    buffer.add("org-1", MetricType.TEAM_MEMBERS, 1)
+    buffer.add("org-1", MetricType.TEAM_MEMBERS, -1)
+    buffer.add("org-1", MetricType.API_CALLS, 1)
+
+    assert buffer.drain() == {"org-1": {MetricType.API_CALLS: 1}}
+
+
+def test_usage_buffer_restore_merges_with_new_deltas():
+    buffer = _UsageBuffer()
+    buffer.add("org-1", MetricType.API_CALLS, 2)
+    totals = buffer.drain()
+    buffer.add("org-1", MetricType.API_CALLS, 1)
+
+    buffer.restore(totals)
+
+    assert buffer.events == 2
+    assert buffer.drain() == {"org-1": {MetricType.API_CALLS: 3}}
+
+
+async def test_flush_local_buffer_restores_unwritten_organizations(monkeypatch):
+    written = []
+
+    async def record_usage_batch(_session, organization_id, metrics):
+        if organization_id == "org-2":
+            msg = "database unavailable"
+            raise RuntimeError(msg)
+        written.append((organization_id, metrics))
+
+    monkeypatch.setattr(usage_service.UsageMetricCRUD, "record_usage_batch", record_usage_batch)
+    service = UsageService()
+    service._local_buffer.add("org-1", MetricType.API_CALLS, 1)
+    service._local_buffer.add("org-2", MetricType.API_CALLS, 4)
+
+    with pytest.raises(RuntimeError):
+        await service.flush_local_buffer(AsyncMock())
+
+    assert written == [("org-1", {MetricType.API_CALLS: 1})]
+    assert service._local_buffer.drain() == {"org-2": {MetricType.API_CALLS: 4}}
+
+
+async def test_shutdown_cancels_flush_loop_and_writes_remaining_usage(monkeypatch):
+    written = []
+
+    async def record_usage_batch(_session, organization_id, metrics):
+        written.append((organization_id, metrics))
+
+    @asynccontextmanager
+    async def session_scope():
+        yield AsyncMock()
+
+    monkeypatch.setattr(usage_service.UsageMetricCRUD, "record_usage_batch", record_usage_batch)
+    monkeypatch.setattr(usage_service, "session_scope", session_scope)
+    monkeypatch.setattr(usage_service, "USAGE_LOCAL_FLUSH_INTERVAL", 3600)
+    service = UsageService()
+    service._buffer_usage_locally("org-1", MetricType.API_CALLS, 2)
+    flush_task = service._local_flush_task
+
+    await service.shutdown()
+
+    assert flush_task.cancelled()
+    assert service._local_flush_task is None
+    assert written == [("org-1", {MetricType.API_CALLS: 2})]
+    assert service._local_buffer.events == 0
@@ -0,0 +1,83 @@
+from uuid import uuid4
+
+import pytest
+from langflow.services.database.models.folder import crud as folder_crud
+from langflow.services.database.models.folder.crud import FolderCRUD
+from langflow.services.database.models.folder.model import Folder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@pytest.fixture(autouse=True)
+def skip_tenant_context(monkeypatch):
+    # set_config() is PostgreSQL-only; the tree query itself runs on SQLite
+    async def set_organization_context(_session, _org_id):
+        pass
+
+    monkeypatch.setattr(folder_crud.TenantContextManager, "set_organization_context", set_organization_context)
+
+
+@pytest.fixture
+async def folders(async_session: AsyncSession):
+    organization_id = uuid4()
+    user_id = uuid4()
+
+    def folder(name, parent=None, owner=user_id):
+        return Folder(
+            id=uuid4(),
+            name=name,
+            parent_id=parent.id if parent else None,
+            user_id=owner,
+            organization_id=organization_id,
+        )
+
+    projects = folder("Projects")
+    beta = folder("beta", projects)
+    alpha = folder("alpha", projects)
+    nested = folder("nested", alpha)
+    archive = folder("Archive")
+    foreign = folder("foreign", projects, owner=uuid4())
+    async_session.add_all([projects, beta, alpha, nested, archive, foreign])
+    await async_session.commit()
+    return {
+        "organization_id": str(organization_id),
+        "user_id": str(user_id),
+        "projects": projects,
+        "alpha": alpha,
+    }
+
+
+def _names(tree):
+    return [(node["name"], _names(node["children"])) for node in tree]
+
+
+async def test_get_folder_tree_nests_children_by_name(async_session: AsyncSession, folders):
+    tree = await FolderCRUD.get_folder_tree(async_session, folders["organization_id"], user_id=folders["user_id"])
+
+    assert _names(tree) == [
+        ("Archive", []),
+        ("Projects", [("alpha", [("nested", [])]), ("beta", [])]),
+    ]
+    projects = tree[1]
+    assert projects["parent_id"] is None
+    assert projects["children"][0]["parent_id"] == str(folders["projects"].id)
+    assert projects["children"][0]["user_id"] == folders["user_id"]
+
+
+async def test_get_folder_tree_from_root_folder(async_session: AsyncSession, folders):
+    tree = await FolderCRUD.get_folder_tree(
+        async_session,
+        folders["organization_id"],
+        user_id=folders["user_id"],
+        root_folder_id=folders["alpha"].id,
+    )
+
+    assert _names(tree) == [("nested", [])]
+
+
+async def test_get_folder_tree_without_user_filter(async_session: AsyncSession, folders):
+    tree = await FolderCRUD.get_folder_tree(async_session, folders["organization_id"])
+
+    assert _names(tree) == [
+        ("Archive", []),
+        ("Projects", [("alpha", [("nested", [])]), ("beta", []), ("foreign", [])]),
+    ]